@@ -6,6 +6,7 @@ from werkzeug.utils import secure_filename
 from database import init_db, db, User, ChatHistory
 from chatbot_model import process_message, load_kb, KB_PATH
 from utils.safety import contains_blocked, sanitize_output
+from utils.image_features import colour_ratios
 from PIL import Image
 import io
 
@@ -316,19 +317,11 @@ def analyze_image_content(img, user_question=""):
     """Analyze image content and provide agricultural insights"""
     width, height = img.size
 
-    # Convert to RGB for analysis
-    rgb_img = img.convert('RGB')
-    pixels = list(rgb_img.getdata())
-    total_pixels = len(pixels)
-
-    # Color analysis for agricultural context
-    green_pixels = sum(1 for r, g, b in pixels if g > r + 20 and g > b + 20)  # Green dominance
-    brown_pixels = sum(1 for r, g, b in pixels if r > 100 and g < 100 and b < 100)  # Brown/dry
-    yellow_pixels = sum(1 for r, g, b in pixels if r > 150 and g > 150 and b < 100)  # Yellowing
-
-    green_ratio = green_pixels / total_pixels
-    brown_ratio = brown_pixels / total_pixels
-    yellow_ratio = yellow_pixels / total_pixels
+    # Color analysis for agricultural context: green dominance, brown/dry, yellowing (one vectorized pass)
+    ratios = colour_ratios(img, green_margin=20)
+    green_ratio = ratios["green"]
+    brown_ratio = ratios["brown"]
+    yellow_ratio = ratios["yellow"]
 
     # Determine plant health status
     if green_ratio > 0.6:
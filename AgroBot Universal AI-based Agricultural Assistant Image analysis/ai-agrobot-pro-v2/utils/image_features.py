@@ -0,0 +1,38 @@
+import numpy as np
+
+BLOCK_ROWS = 256  # rows per strip: bounds the temporary masks to a few MB on 12 MP photos
+
+
+def rgb_array(img) -> np.ndarray:
+    """The image as an (H, W, 3) uint8 array (converted to RGB only if needed)."""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return np.asarray(img, dtype=np.uint8)
+
+
+def _exceeds(a, b, margin):
+    """a > b + margin elementwise on uint8 without widening: a - b wraps when a <= b, so check a > b too."""
+    return (a > b) & (np.subtract(a, b) > margin)
+
+
+def colour_ratios(img, green_margin=20, block_rows=BLOCK_ROWS):
+    """Share of green, brown and yellow pixels, in one strip-wise pass over the uint8 pixels.
+
+    Thresholds match the original per-pixel loops:
+      green:  g > r + green_margin and g > b + green_margin
+      brown:  r > 100 and g < 100 and b < 100
+      yellow: r > 150 and g > 150 and b < 100
+    """
+    arr = rgb_array(img)
+    total = arr.shape[0] * arr.shape[1]
+    if not total:
+        return {"green": 0.0, "brown": 0.0, "yellow": 0.0}
+    green = brown = yellow = 0
+    for top in range(0, arr.shape[0], block_rows):
+        block = arr[top:top + block_rows]
+        r, g, b = block[..., 0], block[..., 1], block[..., 2]
+        low_b = b < 100
+        green += np.count_nonzero(_exceeds(g, r, green_margin) & _exceeds(g, b, green_margin))
+        brown += np.count_nonzero((r > 100) & (g < 100) & low_b)
+        yellow += np.count_nonzero((r > 150) & (g > 150) & low_b)
+    return {"green": green / total, "brown": brown / total, "yellow": yellow / total}
@@ -7,14 +7,28 @@ try:
     TRANSLATOR = Translator(); HAS_GOOGLETRANS = True
 except Exception:
     TRANSLATOR = None; HAS_GOOGLETRANS = False
+from utils.llm_clients import CLIENTS, LLM_TIMEOUT
+from utils.llm_gateway import GATEWAY
+from utils.llm_router import ROUTER
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') or None
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
 if OPENAI_API_KEY:
     try:
-        import openai; openai.api_key = OPENAI_API_KEY; HAS_OPENAI = True
+        import httpx; from openai import OpenAI; HAS_OPENAI = True
     except Exception:
         HAS_OPENAI = False
 else:
     HAS_OPENAI = False
+def _openai_client():
+    # one keep-alive connection pool per worker, so steady-state calls skip the TLS handshake
+    limits = httpx.Limits(max_connections=int(os.getenv('OPENAI_POOL_SIZE', '10')), keepalive_expiry=60)
+    return OpenAI(api_key=OPENAI_API_KEY, http_client=httpx.Client(limits=limits, timeout=LLM_TIMEOUT))
+def _openai_complete(prompt):
+    resp = CLIENTS.get('openai').chat.completions.create(model=OPENAI_MODEL, messages=[{'role':'system','content':'You are an agronomist.'},{'role':'user','content':prompt}], max_tokens=300)
+    return (resp.choices[0].message.content or '').strip()
+if HAS_OPENAI:
+    CLIENTS.register('openai', _openai_client, warmup=lambda c: c.models.list())
+    ROUTER.add('openai', _openai_complete)  # circuit breaking + latency stats; more providers can be added alongside
 KB_PATH = os.path.join(os.path.dirname(__file__), 'kb.json')
 def load_kb():
     if not os.path.exists(KB_PATH): return {}
@@ -53,9 +67,10 @@ def find_in_kb(message: str):
 def openai_fallback(user_profile: Dict[str,Any], message_text: str, target_lang: str='en') -> str:
     if not HAS_OPENAI: return ''
     try:
-        prompt = f"You are an expert agronomist. User profile: {user_profile}\nQuestion: {message_text}\nAnswer concisely."
-        resp = openai.ChatCompletion.create(model='gpt-4o-mini', messages=[{'role':'system','content':'You are an agronomist.'},{'role':'user','content':prompt}], max_tokens=300)
-        text = resp['choices'][0]['message']['content'].strip()
+        profile = {k: v for k, v in user_profile.items() if k != 'id'}  # the id would keep identical questions apart
+        prompt = f"You are an expert agronomist. User profile: {profile}\nQuestion: {message_text}\nAnswer concisely."
+        # identical prompts in flight share one routed call; GATEWAY also caps concurrency
+        text = GATEWAY.call(('llm', prompt), lambda: ROUTER.complete(prompt))
         if target_lang and target_lang!='en' and HAS_GOOGLETRANS: text = translate_text(text, target_lang)
         return text
     except Exception:
@@ -4,12 +4,31 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from translator_util import translate_text, detect_language  # your translation module
 
+from llm_gateway import GATEWAY
+from llm_router import ROUTER
+
 # ------------------- Load environment -------------------
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 client = None
 if api_key:
-    client = OpenAI(api_key=api_key)
+    client = OpenAI(api_key=api_key, timeout=float(os.getenv("LLM_TIMEOUT", "30")))
+
+
+def _openai_complete(user_input):
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are an agriculture assistant. Reply clearly and concisely."},
+            {"role": "user", "content": user_input}
+        ],
+        temperature=0.5
+    )
+    return response.choices[0].message.content.strip()
+
+
+if client:
+    ROUTER.add("openai", _openai_complete)  # circuit breaking + latency stats per provider
 
 
 # ------------------- Greetings & Farewells -------------------
@@ -202,15 +221,8 @@ def ask_openai(user_input: str):
     if not client:
         return None
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an agriculture assistant. Reply clearly and concisely."},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=0.5
-        )
-        return response.choices[0].message.content.strip()
+        # identical questions in flight share one routed call; GATEWAY also caps concurrency
+        return GATEWAY.call(("llm", user_input), lambda: ROUTER.complete(user_input))
     except Exception as e:
         print(f"OpenAI error: {e}")
         return None
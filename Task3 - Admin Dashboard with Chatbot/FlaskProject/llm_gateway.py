@@ -0,0 +1,104 @@
+# Copy of ai-agrobot-pro-v2/utils/llm_gateway.py (this app ships on its own); keep the two in sync.
+import os, threading
+from contextlib import contextmanager
+
+
+class GatewayBusy(Exception):
+    """No upstream slot freed up within the gateway's max_wait."""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMGateway:
+    """Single-flight coalescing plus a concurrency cap for upstream LLM calls.
+
+    ``call(key, fn)`` runs ``fn()`` once per key at a time: callers that
+    arrive while the same key is in flight wait for, and share, that one
+    result (or exception). At most ``max_concurrent`` upstream calls run at
+    once; the rest queue for up to ``max_wait`` seconds and then get
+    GatewayBusy instead of piling onto a rate-limited API. A caller sharing
+    another's call gives up with GatewayBusy after ``max_follow`` seconds, so
+    a hung upstream request can't hold every identical question with it.
+    """
+
+    def __init__(self, max_concurrent=4, max_wait=10.0, max_follow=45.0):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.max_follow = max_follow
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = self.coalesced = self.upstream = self.rejected = self.abandoned = 0
+        self.active = self.peak_active = 0
+
+    def call(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not flight.done.wait(self.max_follow):
+                with self._lock:
+                    self.abandoned += 1
+                raise GatewayBusy(f"identical LLM call still running after {self.max_follow:g}s")
+        else:
+            try:
+                with self.slot():
+                    flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    @contextmanager
+    def slot(self):
+        """Hold one upstream slot (e.g. for a streamed call that can't be coalesced)."""
+        if not self._slots.acquire(timeout=self.max_wait):
+            with self._lock:
+                self.rejected += 1
+            raise GatewayBusy(f"{self.max_concurrent} LLM calls already running; waited {self.max_wait:g}s")
+        with self._lock:
+            self.upstream += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "abandoned": self.abandoned,
+            "active": self.active,
+            "peak_active": self.peak_active,
+            "in_flight_keys": len(self._flights),
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+# Shared by every module that calls an LLM
+GATEWAY = LLMGateway(
+    max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "4")),
+    max_wait=float(os.getenv("LLM_MAX_WAIT", "10")),
+    max_follow=float(os.getenv("LLM_MAX_FOLLOW", "45")),
+)
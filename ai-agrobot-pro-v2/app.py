@@ -1,18 +1,29 @@
-import os, json, time
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
+import os, json, time, threading, uuid
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, Response, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
-from database import init_db, db, User, ChatHistory
-from chatbot_model import process_message, load_kb, KB_PATH
+from database import init_db, db, User, ChatHistory, KnowledgeEntry, KNOWLEDGE_LANGS, upsert_knowledge, replace_knowledge, find_image_analysis, save_image_analysis, AnalysisJob
+from chatbot_model import process_message, process_messages, stream_message, load_kb, save_kb, build_kb_artifact, import_kb_csv, load_kb_entries, iter_csv_entries, kb_json_entries, kb_json_entry, KB_PATH, KB_HOLDER, KB_BACKEND, TRANSLATION_CACHE, RESPONSE_CACHE
+from utils.llm_clients import CLIENTS
+from utils.llm_gateway import GATEWAY
+from utils.llm_router import ROUTER
 from utils.safety import contains_blocked, sanitize_output
+from utils.image_features import colour_ratios
+from utils.image_ingest import spool_upload, decode_for_analysis, persist_upload, UploadTooLarge
+from utils.image_cache import AnalysisCache
+from utils.job_queue import JobQueue, QueueFull
+from utils.image_batch import BatchPool, analyze_image_bytes
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file,session
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
 from flask_login import current_user, login_required
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from database import db, User, ChatHistory
-from gemini_helper import analyze_with_gemini
+from gemini_helper import analyze_with_gemini, gemini_vision, GEMINI_VISION_MODEL
 from dotenv import load_dotenv
 load_dotenv()
 import os
@@ -21,6 +32,10 @@ print("Gemini Key:", os.getenv("GEMINI_API_KEY"))
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "uploads")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# batch image workers (utils.image_batch) re-run this script as __mp_main__ before they take work:
+# they get the app's definitions but must not seed, warm up or requeue anything
+IS_WORKER_IMPORT = __name__ == "__mp_main__"
+
 app = Flask(__name__, static_folder="static", template_folder="templates")
 app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET_KEY", "super_secret_key")
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
@@ -28,6 +43,20 @@ app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 # init DB & default admin
 init_db(app)
 
+# seed the FTS5 knowledge store from kb.json the first time it is used
+if KB_BACKEND == "sqlite" and not IS_WORKER_IMPORT:
+    with app.app_context():
+        try:
+            if not KnowledgeEntry.query.first():
+                print("Seeded knowledge store:", upsert_knowledge(load_kb_entries()), "entries")
+        except Exception as e:
+            db.session.rollback()
+            print("⚠️ Knowledge store seed skipped:", e)
+
+# open LLM connections before the first chat needs them
+if os.getenv("LLM_WARMUP") == "1" and not IS_WORKER_IMPORT:
+    threading.Thread(target=CLIENTS.warmup, name="llm-warmup", daemon=True).start()
+
 # login manager
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -107,6 +136,50 @@ def profile():
     return render_template("profile.html")
 
 # Chat API
+def chat_user_profile():
+    return {
+        "id": current_user.id if current_user.is_authenticated else None,
+        "primary_crop": getattr(current_user, "primary_crop", None),
+        "region": getattr(current_user, "region", None),
+        "preferred_language": getattr(current_user, "preferred_language", "en")
+    }
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def chat_event_stream(user_profile, message):
+    """SSE for one chat: "delta" events with sanitized text, then "done" with the full reply.
+
+    Text is released up to the last whitespace only, because a blocked term
+    never spans whitespace, so every delta is sanitized exactly as the full
+    reply will be. The reply is saved to ChatHistory once the stream ends.
+    """
+    parts, pending = [], ""
+    try:
+        for piece in stream_message(user_profile, message):
+            parts.append(piece)
+            pending += piece
+            cut = max(pending.rfind(c) for c in " \n\t") + 1
+            if cut:
+                yield sse_event("delta", {"text": sanitize_output(pending[:cut])})
+                pending = pending[cut:]
+        if pending:
+            yield sse_event("delta", {"text": sanitize_output(pending)})
+
+        reply = "".join(parts)
+        if not reply.strip():
+            from gemini_helper import ask_gemini
+            reply = ask_gemini(message)
+        reply = sanitize_output(reply)
+
+        db.session.add(ChatHistory(user_id=user_profile["id"], user_message=message, bot_response=reply))
+        db.session.commit()
+        yield sse_event("done", {"response": reply})
+    except Exception as e:
+        db.session.rollback()
+        print("Error /api/chat stream:", e)
+        yield sse_event("error", {"response": "Internal server error"})
+
 @app.route("/api/chat", methods=["POST"])
 def api_chat():
     try:
@@ -119,12 +192,15 @@ def api_chat():
         if contains_blocked(message):
             return jsonify({"response":"❌ Message contains prohibited content."}), 400
 
-        user_profile = {
-            "id": current_user.id if current_user.is_authenticated else None,
-            "primary_crop": getattr(current_user, "primary_crop", None),
-            "region": getattr(current_user, "region", None),
-            "preferred_language": getattr(current_user, "preferred_language", "en")
-        }
+        user_profile = chat_user_profile()
+
+        # Opt-in streaming: the reply arrives as Server-Sent Events while Gemini writes it
+        if data.get("stream"):
+            return Response(
+                stream_with_context(chat_event_stream(user_profile, message)),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
 
         # KB response
         reply = process_message(user_profile, message)
@@ -146,6 +222,56 @@ def api_chat():
         print("Error /api/chat:", e)
         return jsonify({"response":"Internal server error"}), 1000
 
+CHAT_BATCH_MAX = int(os.getenv("CHAT_BATCH_MAX", "100"))
+
+@app.route("/api/chat/batch", methods=["POST"])
+def api_chat_batch():
+    """Answer many messages (e.g. from SMS/IVR gateways) in one request, in input order."""
+    try:
+        data = request.get_json() or {}
+        messages = data.get("messages")
+        if not isinstance(messages, list) or not messages:
+            return jsonify({"error":"messages must be a non-empty list"}), 400
+        if len(messages) > CHAT_BATCH_MAX:
+            return jsonify({"error":f"at most {CHAT_BATCH_MAX} messages per batch"}), 413
+        messages = [(m if isinstance(m, str) else "").strip() for m in messages]
+
+        replies = [None] * len(messages)
+        todo = []
+        for i, message in enumerate(messages):
+            if not message:
+                replies[i] = "Please type a question."
+            elif contains_blocked(message):
+                replies[i] = "❌ Message contains prohibited content."
+            else:
+                todo.append(i)
+
+        user_profile = chat_user_profile()
+        for i, reply in zip(todo, process_messages(user_profile, [messages[i] for i in todo])):
+            replies[i] = reply
+
+        # ✅ Fallback to Gemini, once per distinct question
+        missing = {messages[i] for i in todo if not (replies[i] or "").strip()}
+        if missing:
+            from gemini_helper import ask_gemini
+            fallback = {m: ask_gemini(m) for m in missing}
+            for i in todo:
+                if not (replies[i] or "").strip():
+                    replies[i] = fallback[messages[i]]
+
+        replies = [sanitize_output(r) for r in replies]
+        db.session.add_all([
+            ChatHistory(user_id=user_profile["id"], user_message=messages[i], bot_response=replies[i]) for i in todo
+        ])
+        db.session.commit()
+
+        return jsonify({"responses": replies})
+
+    except Exception as e:
+        db.session.rollback()
+        print("Error /api/chat/batch:", e)
+        return jsonify({"error":"Internal server error"}), 500
+
 # Admin
 @app.route("/admin")
 @login_required
@@ -156,10 +282,27 @@ def admin_dashboard():
     chats = ChatHistory.query.order_by(ChatHistory.created_at.desc()).limit(500).all()
     kb_content = ""
     try:
-        with open(KB_PATH,"r",encoding="utf-8") as f: kb_content = f.read()
+        if KB_BACKEND == "sqlite":
+            # the store is what answers chats, so that is what the editor shows
+            rows = [{"keywords": e.keyword_list, "answers": e.answers} for e in KnowledgeEntry.query.order_by(KnowledgeEntry.id)]
+            kb_content = json.dumps([kb_json_entry(r) for r in rows], ensure_ascii=False, indent=2)
+        else:
+            with open(KB_PATH,"r",encoding="utf-8") as f: kb_content = f.read()
     except Exception:
         kb_content = "[]"
-    return render_template("admin_dashboard.html", users=users, chats=chats, kb_content=kb_content)
+    return render_template("admin_dashboard.html", users=users, chats=chats, kb_content=kb_content, kb_backend=KB_BACKEND)
+
+@app.route("/admin/cache_stats")
+@login_required
+def admin_cache_stats():
+    if current_user.role != "admin": return jsonify({"ok":False,"error":"unauthorized"}),403
+    return jsonify({"ok":True, "translation": TRANSLATION_CACHE.stats(), "responses": RESPONSE_CACHE.stats(), "llm_clients": CLIENTS.stats(), "llm_gateway": GATEWAY.stats(), "llm_router": ROUTER.stats(), "images": IMAGE_CACHE.stats(), "analysis_jobs": ANALYSIS_JOBS.stats(), "batch_pool": BATCH_POOL.stats()})
+
+@app.route("/admin/llm/warmup", methods=["POST"])
+@login_required
+def admin_llm_warmup():
+    if current_user.role != "admin": return jsonify({"ok":False,"error":"unauthorized"}),403
+    return jsonify({"ok":True, "warmup_ms": CLIENTS.warmup()})
 
 @app.route("/admin/edit_kb", methods=["POST"])
 @login_required
@@ -169,10 +312,20 @@ def admin_edit_kb():
     data = request.form.get("kb_data","")
     try:
         parsed = json.loads(data)
-        with open(KB_PATH,"w",encoding="utf-8") as f: json.dump(parsed,f,ensure_ascii=False,indent=2)
-        flash("KB updated", "success")
     except Exception as e:
         flash("Invalid JSON: "+str(e),"danger")
+        return redirect(url_for("admin_dashboard"))
+    try:
+        if KB_BACKEND == "sqlite":
+            # chats are answered from knowledge_entries, so the edit goes there rather than to kb.json
+            added, removed = replace_knowledge(kb_json_entries(parsed))
+            flash(f"Knowledge store updated: {added} added, {removed} removed", "success")
+        else:
+            save_kb(parsed)
+            KB_HOLDER.reload(wait=True)
+            flash(f"KB updated (version {KB_HOLDER.version})", "success")
+    except Exception as e:
+        flash("Could not save KB: "+str(e),"danger")
     return redirect(url_for("admin_dashboard"))
 
 @app.route("/admin/upload_kb_csv", methods=["POST"])
@@ -182,30 +335,142 @@ def admin_upload_kb_csv():
     f = request.files.get("csv_file")
     if not f: flash("No file uploaded","warning"); return redirect(url_for("admin_dashboard"))
     filename = secure_filename(f.filename); path = os.path.join(app.config['UPLOAD_FOLDER'], filename); f.save(path)
-    # minimal CSV parse (keywords,answer_en,answer_hi,answer_ta)
-    import csv
-    rows = []
+    # streamed import (keywords,answer_en,answer_hi,answer_ta); rows already in the KB are skipped
     try:
-        with open(path,newline='',encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for r in reader:
-                keys = [k.strip() for k in (r.get('keywords') or "").split(',') if k.strip()]
-                rows.append({"keywords": keys, "answer_en": r.get('answer_en') or "", "answer_hi": r.get('answer_hi') or "", "answer_ta": r.get('answer_ta') or ""})
-        # merge into KB
-        try:
-            with open(KB_PATH,"r",encoding='utf-8') as f: existing = json.load(f)
-            if not isinstance(existing,list): existing=[]
-        except Exception:
-            existing=[]
-        existing.extend(rows)
-        with open(KB_PATH,"w",encoding='utf-8') as f: json.dump(existing,f,ensure_ascii=False,indent=2)
-        flash(f"Imported {len(rows)} rows","success")
+        if KB_BACKEND == "sqlite":
+            flash(f"Imported {upsert_knowledge(iter_csv_entries(path))} new rows into the knowledge store","success")
+            return redirect(url_for("admin_dashboard"))
+        added, skipped = import_kb_csv(path)
+        flash(f"Imported {added} new rows, skipped {skipped} duplicates (KB version {KB_HOLDER.version})","success")
     except Exception as e:
         flash("CSV parse error: "+str(e),"danger")
     return redirect(url_for("admin_dashboard"))
 
+# Row-level knowledge store edits (KB_BACKEND=sqlite); each is one transaction
+@app.route("/admin/kb/entry", methods=["POST"])
+@app.route("/admin/kb/entry/<int:entry_id>", methods=["POST"])
+@login_required
+def admin_save_kb_entry(entry_id=None):
+    if current_user.role != "admin": return jsonify({"ok":False,"error":"unauthorized"}),403
+    entry = KnowledgeEntry.query.get_or_404(entry_id) if entry_id else KnowledgeEntry()
+    entry.keywords = request.form.get("keywords","").strip()
+    entry.set_answers({lang: request.form.get(f"answer_{lang}","") for lang in KNOWLEDGE_LANGS})
+    if not entry.keyword_list:
+        flash("Keywords are required","warning"); return redirect(url_for("admin_dashboard"))
+    entry.refresh_key()
+    try:
+        db.session.add(entry); db.session.commit()
+        flash(f"KB entry #{entry.id} saved","success")
+    except Exception as e:
+        db.session.rollback()
+        flash("Could not save entry (duplicate?): "+str(e),"danger")
+    return redirect(url_for("admin_dashboard"))
+
+@app.route("/admin/kb/entry/<int:entry_id>/delete", methods=["POST"])
+@login_required
+def admin_delete_kb_entry(entry_id):
+    if current_user.role != "admin": return jsonify({"ok":False,"error":"unauthorized"}),403
+    db.session.delete(KnowledgeEntry.query.get_or_404(entry_id)); db.session.commit()
+    flash(f"KB entry #{entry_id} deleted","success")
+    return redirect(url_for("admin_dashboard"))
+
 # Image analyze endpoint (simple local heuristic)
 ALLOWED_EXT = {'png','jpg','jpeg'}
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_KB", "1024")) * 1024
+# analyzed originals are written to uploads/ alongside the chat history entry; UPLOAD_KEEP=0 never stores them
+KEEP_UPLOADS = os.getenv("UPLOAD_KEEP", "1") == "1"
+# bump when thresholds or decoding change, so cached results of the old analyzer are not reused
+LEAF_ANALYZER_VERSION = "colour-200px-v1"
+# results by SHA-256 of the upload: resent / forwarded photos are answered without decoding them again
+IMAGE_CACHE = AnalysisCache(find_image_analysis, save_image_analysis, max_entries=int(os.getenv("IMAGE_CACHE_SIZE", "1024")))
+
+def stored_upload_name(digest, filename):
+    """uploads/<sha256>.<ext>: every copy of the same image shares one file."""
+    ext = filename.rsplit('.', 1)[1].lower()
+    return f"{digest}.{'jpg' if ext == 'jpeg' else ext}"
+
+# === Gemini vision jobs: run off the request thread, polled at /api/analyze-image/<job_id> ===
+HAS_VISION = bool(os.getenv("GEMINI_API_KEY"))
+GEMINI_ANALYZER_VERSION = f"gemini:{GEMINI_VISION_MODEL}"
+ANALYSIS_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", "3"))
+# a job still "running" after this long belonged to a process that died; it is queued again at startup
+ANALYSIS_STALE_SECONDS = int(os.getenv("ANALYSIS_STALE_SECONDS", "600"))
+
+def run_analysis_job(job_id):
+    """Claim a queued job, run Gemini vision on its stored image (retrying with backoff) and record the outcome."""
+    with app.app_context():
+        claimed = AnalysisJob.query.filter_by(id=job_id, status="queued").update({"status": "running", "updated_at": datetime.utcnow()})
+        db.session.commit()
+        if not claimed:
+            return  # finished, or another worker has it
+        job = db.session.get(AnalysisJob, job_id)
+        # the answer depends on the question too, so only question-less analyses are shared by content hash
+        text = None if job.message else IMAGE_CACHE.get(job.content_hash, GEMINI_ANALYZER_VERSION)
+        while text is None:
+            job.attempts += 1
+            db.session.commit()
+            try:
+                text = gemini_vision(os.path.join(app.config['UPLOAD_FOLDER'], job.stored_name), job.message) or ""
+                if not text.strip():
+                    raise ValueError("empty answer from Gemini vision")
+                if not job.message:
+                    IMAGE_CACHE.put(job.content_hash, GEMINI_ANALYZER_VERSION, text, job.stored_name)
+            except Exception as e:
+                text = None
+                job.error = str(e)
+                if job.attempts >= ANALYSIS_MAX_ATTEMPTS:
+                    job.status = "failed"
+                    db.session.commit()
+                    return
+                time.sleep(2 ** job.attempts)
+        job.status, job.result, job.error = "done", sanitize_output(text), None
+        if job.user_id:
+            user_msg = f"[Image: {job.filename}] {job.message}" if job.message else f"[Image: {job.filename}]"
+            db.session.add(ChatHistory(user_id=job.user_id, user_message=user_msg, bot_response=job.result))
+        db.session.commit()
+
+ANALYSIS_JOBS = JobQueue(
+    run_analysis_job,
+    workers=int(os.getenv("ANALYSIS_WORKERS", "2")),
+    max_pending=int(os.getenv("ANALYSIS_MAX_PENDING", "100")),
+)
+
+def requeue_analysis_jobs():
+    """Re-submit jobs left queued by a previous process, or stuck running past ANALYSIS_STALE_SECONDS."""
+    stale = datetime.utcnow() - timedelta(seconds=ANALYSIS_STALE_SECONDS)
+    with app.app_context():
+        AnalysisJob.query.filter(AnalysisJob.status == "running", AnalysisJob.updated_at < stale).update({"status": "queued"})
+        db.session.commit()
+        job_ids = [job_id for (job_id,) in db.session.query(AnalysisJob.id).filter_by(status="queued").order_by(AnalysisJob.created_at)]
+    for job_id in job_ids:
+        try:
+            ANALYSIS_JOBS.submit(job_id)
+        except QueueFull:
+            break  # the rest wait for the next restart
+    if job_ids:
+        print(f"🔁 Requeued {len(job_ids)} image analysis jobs")
+
+if HAS_VISION and not IS_WORKER_IMPORT:
+    requeue_analysis_jobs()
+
+def leaf_analysis(im):
+    """Local green-coverage heuristic on a 200x200 RGB image."""
+    return leaf_verdict(colour_ratios(im, green_margin=10)["green"])
+
+def leaf_verdict(healthy_ratio):
+    """Label, advice and green percentage for a share of green pixels."""
+    if healthy_ratio < 0.05:
+        status = "Severe discoloration / possible disease"
+        advice = "Image shows low green content. Inspect plants for diseases or nutrient deficiency."
+    elif healthy_ratio < 0.4:
+        status = "Partial damage / early symptoms"
+        advice = "Signs of stress detected. Check for pests, water stress, or nutrient issues."
+    else:
+        status = "Likely healthy leaf"
+        advice = "Leaf appears healthy with good green coverage."
+    return {"label": status, "advice": advice, "green_percentage": round(healthy_ratio * 100, 1)}
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.',1)[1].lower() in ALLOWED_EXT
 
@@ -239,35 +504,36 @@ def analyze_image():
         # Get text message if provided
         text_message = request.form.get('message', '').strip()
 
-        # Save file
+        # Keep the upload in memory (spilling to a temp file past UPLOAD_SPOOL_BYTES), hashing it on the way in
         filename = secure_filename(file.filename)
-        save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(save_path)
-
-        # Analyze image
-        from PIL import Image
-        im = Image.open(save_path).convert('RGB').resize((200, 200))
-        pixels = list(im.getdata())
-        greens = sum(1 for r, g, b in pixels if g > r + 10 and g > b + 10)
-        total = len(pixels)
-        healthy_ratio = greens / total
-
-        # Determine health status
-        if healthy_ratio < 0.05:
-            status = "Severe discoloration / possible disease"
-            advice = "Image shows low green content. Inspect plants for diseases or nutrient deficiency."
-        elif healthy_ratio < 0.4:
-            status = "Partial damage / early symptoms"
-            advice = "Signs of stress detected. Check for pests, water stress, or nutrient issues."
-        else:
-            status = "Likely healthy leaf"
-            advice = "Leaf appears healthy with good green coverage."
+        try:
+            upload, digest = spool_upload(file.stream, MAX_UPLOAD_BYTES, UPLOAD_SPOOL_BYTES)
+        except UploadTooLarge as e:
+            return jsonify({"success": False, "error": str(e)}), 413
+
+        # engine=gemini also queues a Gemini vision job; the local result below is returned meanwhile
+        vision = request.form.get('engine') == 'gemini' and HAS_VISION and current_user.is_authenticated
+
+        with upload:
+            result = IMAGE_CACHE.get(digest, LEAF_ANALYZER_VERSION)
+            cached = result is not None
+            if not cached:
+                # Analyze image, decoded directly at 200x200
+                result = leaf_analysis(decode_for_analysis(upload, (200, 200)))
+            stored_name = stored_upload_name(digest, filename)
+            stored_path = os.path.join(app.config['UPLOAD_FOLDER'], stored_name)
+            # the vision job reads the image from disk, so it is stored even with UPLOAD_KEEP=0
+            keep = (current_user.is_authenticated and KEEP_UPLOADS) or vision
+            if keep and not os.path.exists(stored_path):
+                persist_upload(upload, stored_path)
+            if not cached:
+                IMAGE_CACHE.put(digest, LEAF_ANALYZER_VERSION, result, stored_name if keep else None)
 
         # Create detailed response
         response = f"🌿 **Image Analysis Results:**\n\n"
-        response += f"**Health Status:** {status}\n"
-        response += f"**Green Coverage:** {round(healthy_ratio * 100, 1)}%\n\n"
-        response += f"**Recommendations:**\n{advice}\n\n"
+        response += f"**Health Status:** {result['label']}\n"
+        response += f"**Green Coverage:** {result['green_percentage']}%\n\n"
+        response += f"**Recommendations:**\n{result['advice']}\n\n"
 
         if text_message:
             response += f"\n**Your Question:** {text_message}\n"
@@ -284,13 +550,31 @@ def analyze_image():
             db.session.add(ch)
             db.session.commit()
 
-        return jsonify({
+        payload = {
             "success": True,
             "response": response,
-            "label": status,
-            "advice": advice,
-            "green_percentage": round(healthy_ratio * 100, 1)
-        })
+            "label": result["label"],
+            "advice": result["advice"],
+            "green_percentage": result["green_percentage"],
+            "content_hash": digest,
+            "cached": cached
+        }
+        if not vision:
+            return jsonify(payload)
+
+        job = AnalysisJob(id=uuid.uuid4().hex, user_id=current_user.id, content_hash=digest,
+                          filename=filename, stored_name=stored_name, message=text_message)
+        db.session.add(job)
+        db.session.commit()
+        try:
+            ANALYSIS_JOBS.submit(job.id)
+        except QueueFull as e:
+            job.status, job.error = "failed", str(e)
+            db.session.commit()
+            payload["job"] = job.to_dict()
+            return jsonify(payload), 503
+        payload["job"] = dict(job.to_dict(), status_url=url_for("analysis_job_status", job_id=job.id))
+        return jsonify(payload), 202
 
     except Exception as e:
         print("Image analysis error:", e)
@@ -299,6 +583,111 @@ def analyze_image():
             "error": "Image analysis failed",
             "message": str(e)
         }), 500
+
+# === Batch analysis: many photos per request, decoded in worker processes ===
+BATCH_POOL = BatchPool(int(os.getenv("BATCH_WORKERS", "0")) or None)
+BATCH_MAX_IMAGES = int(os.getenv("BATCH_MAX_IMAGES", "50"))
+HEALTHY_LABEL = leaf_verdict(1.0)["label"]
+
+def field_summary(results):
+    """Aggregate field health over per-image results (failed images are only counted)."""
+    ok = [r for r in results if "error" not in r]
+    summary = {"images": len(results), "analyzed": len(ok), "failed": len(results) - len(ok)}
+    if not ok:
+        return summary
+    greens = [r["green_percentage"] for r in ok]
+    mean_green = sum(greens) / len(greens)
+    by_status = {}
+    for r in ok:
+        by_status[r["label"]] = by_status.get(r["label"], 0) + 1
+    summary.update({
+        "field_status": leaf_verdict(mean_green / 100)["label"],
+        "mean_green_percentage": round(mean_green, 1),
+        "min_green_percentage": min(greens),
+        "healthy_share": round(by_status.get(HEALTHY_LABEL, 0) / len(ok), 3),
+        "by_status": by_status,
+        # least green first: the photos to look at before the others
+        "needs_attention": [r["filename"] for r in sorted(ok, key=lambda r: r["green_percentage"]) if r["label"] != HEALTHY_LABEL],
+    })
+    return summary
+
+@app.route("/api/analyze-images", methods=["POST"])
+@login_required
+def analyze_images_batch():
+    """Analyze a scouting round's photos (multipart field "images", repeated) in one request."""
+    files = [f for f in request.files.getlist('images') if f and f.filename]
+    if not files:
+        return jsonify({"success": False, "error": "No image files provided"}), 400
+    if len(files) > BATCH_MAX_IMAGES:
+        return jsonify({"success": False, "error": f"At most {BATCH_MAX_IMAGES} images per batch"}), 400
+    text_message = request.form.get('message', '').strip()
+    keep = current_user.is_authenticated and KEEP_UPLOADS
+
+    results, todo = [], []  # todo: (index in results, digest, stored name, spooled upload) still to analyze
+    with ExitStack() as spools:
+        for file in files:
+            filename = secure_filename(file.filename)
+            if not allowed_file(file.filename):
+                results.append({"filename": filename, "error": "Invalid file type"})
+                continue
+            try:
+                upload, digest = spool_upload(file.stream, MAX_UPLOAD_BYTES, UPLOAD_SPOOL_BYTES)
+            except UploadTooLarge as e:
+                results.append({"filename": filename, "error": str(e)})
+                continue
+            spools.enter_context(upload)
+            stored_name = stored_upload_name(digest, filename)
+            stored_path = os.path.join(app.config['UPLOAD_FOLDER'], stored_name)
+            if keep and not os.path.exists(stored_path):
+                persist_upload(upload, stored_path)
+            entry = {"filename": filename, "content_hash": digest}
+            result = IMAGE_CACHE.get(digest, LEAF_ANALYZER_VERSION)
+            if result is None:
+                todo.append((len(results), digest, stored_name if keep else None, upload))
+            else:
+                upload.close()
+            entry.update(result or {}, cached=result is not None)
+            results.append(entry)
+
+        # decoding and pixel work run in parallel in the worker processes, off this thread's GIL;
+        # uploads stay spooled (large ones on disk) and are read only as workers free up
+        outcomes = BATCH_POOL.map(analyze_image_bytes, (upload.read() for _, _, _, upload in todo))
+        try:
+            for (i, digest, stored_name, upload), (ratios, error) in zip(todo, outcomes):
+                upload.close()
+                if error is not None:
+                    results[i] = {"filename": results[i]["filename"], "content_hash": digest, "error": f"Image analysis failed: {error}"}
+                    continue
+                result = leaf_verdict(ratios["green"])
+                IMAGE_CACHE.put(digest, LEAF_ANALYZER_VERSION, result, stored_name)
+                results[i].update(result)
+        except Exception as e:
+            # the worker pool itself failed, e.g. workers could not be started again after a crash
+            print("Batch image analysis error:", e)
+            return jsonify({"success": False, "error": "Image analysis failed", "message": str(e)}), 500
+
+    summary = field_summary(results)
+    if current_user.is_authenticated and summary["analyzed"]:
+        response = f"🌿 **Field Analysis ({summary['analyzed']} images):**\n\n"
+        response += f"**Field Status:** {summary['field_status']}\n"
+        response += f"**Average Green Coverage:** {summary['mean_green_percentage']}%\n"
+        if summary["needs_attention"]:
+            response += f"**Needs Attention:** {', '.join(summary['needs_attention'])}\n"
+        user_msg = f"[Images: {len(files)}] {text_message}" if text_message else f"[Images: {len(files)}]"
+        db.session.add(ChatHistory(user_id=current_user.id, user_message=user_msg, bot_response=response))
+        db.session.commit()
+
+    return jsonify({"success": True, "results": results, "summary": summary})
+
+@app.route("/api/analyze-image/<job_id>")
+@login_required
+def analysis_job_status(job_id):
+    """Status of a Gemini vision job: queued, running, done (with result) or failed (with error)."""
+    job = db.session.get(AnalysisJob, job_id)
+    if job is None or (job.user_id != current_user.id and current_user.role != "admin"):
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify(dict(job.to_dict(), success=True))
+
 @app.route("/uploads/<path:filename>")
 @login_required
 def uploaded_file(filename):
@@ -333,5 +722,18 @@ def admin_clear_chats():
     flash("✅ All chat history cleared successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
+# KB maintenance CLI
+@app.cli.group()
+def kb():
+    """Knowledge base maintenance commands."""
+
+@kb.command("build")
+@click.option("--output", default=None, help="Snapshot path (defaults to KB_SNAPSHOT_PATH).")
+@click.option("--translate/--no-translate", default=True, help="Fill missing KB_LANGUAGES answers with KB_TRANSLATOR.")
+def kb_build(output, translate):
+    """Compile kb.json and kb_*.csv into the mmap-able KB snapshot."""
+    path = build_kb_artifact(output, translate=translate)
+    click.echo(f"✅ KB snapshot written to {path} ({os.path.getsize(path)} bytes)")
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0")
\ No newline at end of file
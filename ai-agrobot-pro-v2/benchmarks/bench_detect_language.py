@@ -0,0 +1,59 @@
+"""Microbenchmark: script-table language detection vs. plain langdetect.
+
+Run from ai-agrobot-pro-v2/:  python benchmarks/bench_detect_language.py
+"""
+import os, re, sys, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langdetect import detect, DetectorFactory
+from utils.lang_detect import LanguageDetector
+
+DetectorFactory.seed = 0
+
+MESSAGES = [
+    "How do I control aphids on my tomato plants?",
+    "What is the best fertilizer for rice?",
+    "टमाटर में कीट नियंत्रण कैसे करें?",
+    "गेहूं की बुवाई का सही समय क्या है",
+    "தக்காளி செடியில் பூச்சி கட்டுப்பாடு எப்படி?",
+    "వరి పంటకు ఎరువులు ఏమిటి?",
+    "തക്കാളി കൃഷി എങ്ങനെ ചെയ്യാം?",
+    "tomato me keede ka ilaj batao",
+]
+
+
+def old_detect(text):
+    """detect_language as it was: langdetect plus the Devanagari override."""
+    try:
+        lang = detect(text)
+        if re.search(r"[\u0900-\u097F]", text):
+            return "hi"
+        return lang
+    except Exception:
+        return "en"
+
+
+def bench(label, fn, number, messages=MESSAGES):
+    secs = timeit.timeit(lambda: [fn(m) for m in messages], number=number)
+    per_call = secs / (number * len(messages)) * 1e6
+    print(f"{label:<28} {per_call:10.1f} µs/message")
+    return per_call
+
+
+def main(number=50):
+    old_detect(MESSAGES[0])  # load langdetect profiles outside the timing
+    detector = LanguageDetector(detect)
+    for m in MESSAGES:
+        print(f"  {old_detect(m):>3} → {detector(m):<3} {m}")
+    base = bench("langdetect + regex", old_detect, number)
+    cold = bench("script table (uncached)", lambda m: detector._detect(m), number)
+    # everything except the romanized message, which still goes to langdetect
+    script_only = [m for m in MESSAGES if not m.isascii() or detector(m) == "en"]
+    bench("  ...script decided only", lambda m: detector._detect(m), number, script_only)
+    warm = bench("script table (cached)", detector, number)
+    print(f"speedup: {base / cold:.0f}x uncached, {base / warm:.0f}x cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""End-to-end benchmark of chatbot_model.process_message against the local mock servers.
+
+Starts benchmarks/mock_servers.py in-process, points Gemini, OpenAI (if installed),
+Google Translate and the connectivity probe at it, then runs a fixed message mix
+(KB hits, LLM fallbacks, Hindi/Tamil questions) from several threads.
+
+Run from ai-agrobot-pro-v2/:
+  python benchmarks/bench_process_message.py --latency lognormal:300:0.4 --error-rate 0.02 --threads 8
+"""
+import argparse, os, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mock_servers
+
+MESSAGES = [
+    "How do I control aphids on my tomato plants?",
+    "What is the best fertilizer for rice?",
+    "Which drone sensor should I use to map salinity on a coastal farm?",
+    "My mango flowers are dropping after the fog, what should I spray?",
+    "टमाटर में कीट नियंत्रण कैसे करें?",
+    "मेरी गेहूं की पत्तियों पर नारंगी धब्बे क्यों हैं?",
+    "தக்காளி செடியில் பூச்சி கட்டுப்பாடு எப்படி?",
+    "Is it too late to sow mustard after the first week of November?",
+]
+
+PROFILE = {"id": 0, "name": "Bench", "primary_crop": "tomato", "region": "Kerala"}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", default="lognormal:300:0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the message mix")
+    parser.add_argument("--response-cache", action="store_true", help="keep the LLM response cache on (off by default)")
+    args = parser.parse_args()
+
+    server, mock = mock_servers.start(latency=args.latency, error_rate=args.error_rate, seed=args.seed, chunk_delay_ms=0)
+    base = f"http://127.0.0.1:{server.server_port}"
+    tmp = tempfile.mkdtemp(prefix="agrobot-bench-")
+    # must be set before chatbot_model is imported: the module reads them at import time
+    os.environ.update({
+        "GEMINI_API_KEY": "mock",
+        "GEMINI_BASE_URL": base,
+        "OPENAI_API_KEY": "mock",
+        "OPENAI_BASE_URL": base + "/v1",
+        "TRANSLATE_BASE_URL": base + "/m",
+        "CONNECTIVITY_PROBE_ADDR": f"127.0.0.1:{server.server_port}",
+        "TRANSLATION_CACHE_PATH": os.path.join(tmp, "translation_cache.db"),
+        "KB_SNAPSHOT_PATH": os.path.join(tmp, "kb.snapshot"),
+    })
+    if not args.response_cache:
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+
+    import chatbot_model
+    chatbot_model.KB_HOLDER.reload(wait=True)
+
+    def one(message):
+        start = time.perf_counter()
+        chatbot_model.process_message(PROFILE, message)
+        return time.perf_counter() - start
+
+    work = MESSAGES * args.rounds
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = list(pool.map(one, work))
+    wall = time.perf_counter() - start
+
+    print(f"messages: {len(work)}  threads: {args.threads}  mock latency: {args.latency}  error rate: {args.error_rate}")
+    print(f"p50 {percentile(latencies, 0.5) * 1000:8.1f} ms   p95 {percentile(latencies, 0.95) * 1000:8.1f} ms   "
+          f"throughput {len(work) / wall:6.1f} msg/s")
+    print(f"mock requests: {mock.requests}  injected errors: {mock.errors}")
+    print("router:", chatbot_model.ROUTER.stats())
+    print("translation cache:", chatbot_model.TRANSLATION_CACHE.stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Local stand-ins for Gemini (REST), OpenAI and Google Translate, for offline load tests.
+
+One HTTP server answers the endpoints the app uses:
+  POST /v1beta/models/<model>:generateContent | :streamGenerateContent | :countTokens
+  POST /v1/chat/completions (with "stream": true as SSE),  GET /v1/models
+  GET  /m?sl=..&tl=..&q=..   (the mobile Google Translate page deep_translator scrapes)
+
+Point the app at it with
+  GEMINI_API_KEY=mock GEMINI_BASE_URL=http://127.0.0.1:8089
+  OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+  TRANSLATE_BASE_URL=http://127.0.0.1:8089/m  CONNECTIVITY_PROBE_ADDR=127.0.0.1:8089
+
+Run from ai-agrobot-pro-v2/:
+  python benchmarks/mock_servers.py --latency lognormal:400:0.5 --error-rate 0.02 --seed 1
+"""
+import argparse, html, json, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class MockConfig:
+    """Latency distribution, error rate and streaming shape shared by every endpoint.
+
+    ``latency`` is "fixed:MS", "uniform:LO_MS:HI_MS" or "lognormal:MEDIAN_MS:SIGMA".
+    Random draws come from one seeded generator, so a run is reproducible.
+    """
+
+    def __init__(self, latency="fixed:0", error_rate=0.0, stream_chunks=4, chunk_delay_ms=50, seed=0):
+        kind, *args = latency.split(":")
+        self.kind, self.args = kind, [float(a) for a in args]
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self.chunk_delay = chunk_delay_ms / 1000
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """(latency seconds, fail?) for one request."""
+        with self._lock:
+            self.requests += 1
+            if self.kind == "uniform":
+                ms = self._rng.uniform(*self.args)
+            elif self.kind == "lognormal":
+                median, sigma = self.args
+                ms = self._rng.lognormvariate(0, sigma) * median
+            else:
+                ms = self.args[0] if self.args else 0.0
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        return ms / 1000, fail
+
+
+def answer_for(prompt: str) -> str:
+    """Deterministic reply text, a few sentences long so chunking and streaming have work."""
+    topic = " ".join(prompt.split()[-6:])[:80]
+    return (
+        f"Mock agronomist answer about: {topic}. "
+        "Check the leaves and soil moisture first. "
+        "Apply a balanced NPK fertilizer and remove affected plants."
+    )
+
+
+def split_text(text, n):
+    words = text.split(" ")
+    size = max(1, -(-len(words) // n))
+    return [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "") for i in range(0, len(words), size)]
+
+
+def make_handler(config: MockConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def log_message(self, *args):
+            pass
+
+        # === Helpers ===
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _send(self, status, payload, content_type="application/json"):
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _start_chunked(self, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _simulate(self):
+            """Sleep the drawn latency; answer 503 and return False for an injected error."""
+            delay, fail = config.draw()
+            time.sleep(delay)
+            if fail:
+                self._send(503, {"error": {"code": 503, "message": "mock overload", "status": "UNAVAILABLE"}})
+                return False
+            return True
+
+        # === Routes ===
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/v1/models":
+                return self._send(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+            if url.path == "/m":
+                if not self._simulate():
+                    return
+                q = parse_qs(url.query)
+                text = f"[{q.get('tl', ['?'])[0]}] {q.get('q', [''])[0]}"
+                page = f'<html><body><div class="t0">{html.escape(text)}</div></body></html>'
+                return self._send(200, page.encode(), "text/html; charset=utf-8")
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            body = self._body()
+            if path.endswith(":countTokens"):
+                return self._send(200, {"totalTokens": 1})
+            if path.endswith(":generateContent") or path.endswith(":streamGenerateContent"):
+                if not self._simulate():
+                    return
+                parts = [p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", [])]
+                text = answer_for(" ".join(parts))
+                if path.endswith(":generateContent"):
+                    return self._send(200, gemini_response(text))
+                self._start_chunked("application/json")
+                pieces = split_text(text, config.stream_chunks)
+                for i, piece in enumerate(pieces):
+                    prefix = b"[" if i == 0 else b",\r\n"
+                    self._chunk(prefix + json.dumps(gemini_response(piece)).encode())
+                    time.sleep(config.chunk_delay)
+                self._chunk(b"]")
+                return self._chunk(b"")
+            if path == "/v1/chat/completions":
+                if not self._simulate():
+                    return
+                prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+                text = answer_for(prompt)
+                if not body.get("stream"):
+                    return self._send(200, openai_response(body.get("model"), text))
+                self._start_chunked("text/event-stream")
+                for piece in split_text(text, config.stream_chunks):
+                    delta = openai_response(body.get("model"), piece, stream=True)
+                    self._chunk(b"data: " + json.dumps(delta).encode() + b"\n\n")
+                    time.sleep(config.chunk_delay)
+                self._chunk(b"data: [DONE]\n\n")
+                return self._chunk(b"")
+            self._send(404, {"error": "not found"})
+
+    return Handler
+
+
+def gemini_response(text):
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": len(text.split())},
+    }
+
+
+def openai_response(model, text, stream=False):
+    choice = {"index": 0, "finish_reason": None if stream else "stop"}
+    choice["delta" if stream else "message"] = {"role": "assistant", "content": text}
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk" if stream else "chat.completion",
+        "created": int(time.time()),
+        "model": model or "gpt-4o-mini",
+        "choices": [choice],
+        "usage": None if stream else {"prompt_tokens": 1, "completion_tokens": len(text.split()), "total_tokens": 1},
+    }
+
+
+def start(port=0, **config):
+    """Start the mock server on a daemon thread; returns (server, MockConfig). Port 0 picks a free one."""
+    cfg = MockConfig(**config)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cfg))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-servers", daemon=True).start()
+    return server, cfg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=4)
+    parser.add_argument("--chunk-delay-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server, _ = start(
+        args.port, latency=args.latency, error_rate=args.error_rate,
+        stream_chunks=args.stream_chunks, chunk_delay_ms=args.chunk_delay_ms, seed=args.seed,
+    )
+    print(f"✅ Mock Gemini/OpenAI/Translate on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
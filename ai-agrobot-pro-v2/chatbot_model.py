@@ -1,6 +1,24 @@
-import os, json, re, socket
+import os, json, socket, csv, glob, time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 from langdetect import detect, DetectorFactory
+from utils.kb_index import KBIndex
+from utils.kb_holder import KBHolder
+from utils.kb_rank import build_ranker, rank_tokens, phrase_coverage, STOPWORDS
+from utils.kb_snapshot import write_snapshot, open_snapshot
+from utils.kb_fuzzy import SymSpell
+from utils.kb_import import append_json_array
+from utils.kb_index import tokenize, normalize_text
+from utils.translation_cache import TranslationCache
+from utils.kb_translate import load_translator, fill_translations
+from utils.lang_detect import LanguageDetector
+from utils.chunked_translate import translate_chunked
+from utils.connectivity import ConnectivityMonitor
+from utils.response_cache import ResponseCache
+from utils.llm_clients import CLIENTS, genai_options, genai_request_options, LLM_TIMEOUT
+from utils.llm_gateway import GATEWAY, GatewayBusy
+from utils.llm_router import ROUTER
 
 # === Deep Translator setup ===
 try:
@@ -11,10 +29,45 @@ except ImportError:
 
 from deep_translator import GoogleTranslator
 
+# TRANSLATE_BASE_URL swaps the scraped Google Translate page for another host (e.g. benchmarks/mock_servers.py)
+if os.getenv("TRANSLATE_BASE_URL"):
+    from deep_translator.constants import BASE_URLS
+    BASE_URLS["GOOGLE_TRANSLATE"] = os.getenv("TRANSLATE_BASE_URL")
+
+# Repeated KB answers are translated once, then served from memory or instance/translation_cache.db
+TRANSLATION_CACHE = TranslationCache(
+    os.getenv("TRANSLATION_CACHE_PATH", os.path.join(os.path.dirname(__file__), "instance", "translation_cache.db")),
+    max_chars=int(os.getenv("TRANSLATION_CACHE_CHARS", "2000000")),
+    max_rows=int(os.getenv("TRANSLATION_CACHE_ROWS", "100000")),
+)
+
+# Long texts are split at sentence ends and their chunks translated concurrently, each within the deadline
+TRANSLATE_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("TRANSLATE_WORKERS", "4")), thread_name_prefix="translate")
+TRANSLATE_DEADLINE = float(os.getenv("TRANSLATE_DEADLINE", "8"))
+
+def cached_translate(text, target, source="auto", deadline=None):
+    """GoogleTranslator through TRANSLATION_CACHE, chunked and bounded by a deadline.
+
+    Errors (including TranslationTimeout) propagate and are never cached.
+    """
+    if not text or not text.strip():
+        return text
+    hit = TRANSLATION_CACHE.get(text, source, target)
+    if hit is not None:
+        return hit
+    result = translate_chunked(
+        text,
+        lambda chunk: GoogleTranslator(source=source, target=target).translate(chunk),
+        TRANSLATE_POOL,
+        TRANSLATE_DEADLINE if deadline is None else deadline,
+    )
+    if result:
+        TRANSLATION_CACHE.put(text, source, target, result)
+    return result
+
 def safe_translate(text, target="en"):
     try:
-        translator = GoogleTranslator(source="auto", target=target)
-        return translator.translate(text)
+        return cached_translate(text, target)
     except Exception as e:
         print(f"⚠️ Translation error: {e}")
         return text   # fallback without error
@@ -37,145 +90,646 @@ HAS_GEMINI = False
 if GEMINI_API_KEY:
     try:
         import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
+        genai.configure(api_key=GEMINI_API_KEY, **genai_options())
         HAS_GEMINI = True
     except Exception as e:
         print("⚠️ Gemini import failed:", e)
         HAS_GEMINI = False
 
+GEMINI_CHAT_MODEL = os.getenv("GEMINI_CHAT_MODEL", "gemini-2.0-flash-lite")
+
+def gemini_pool_stats(model):
+    """Transport of a GenerativeModel and whether it has opened its connection yet."""
+    transport = getattr(model._client, "_transport", None)
+    return {"transport": type(transport).__name__ if transport else None, "connected": transport is not None}
+
+if HAS_GEMINI:
+    # one model (and connection) per worker instead of one per request
+    CLIENTS.register(
+        "gemini-chat",
+        lambda: genai.GenerativeModel(GEMINI_CHAT_MODEL),
+        warmup=lambda model: model.count_tokens("ping"),
+        pool_stats=gemini_pool_stats,
+    )
+
+    def _gemini_complete(prompt):
+        response = CLIENTS.get("gemini-chat").generate_content(prompt, request_options=genai_request_options())
+        return response.text.strip() if response and response.text else ""
+
+    ROUTER.add("gemini", _gemini_complete)
+
+# === Optional OpenAI provider (routed alongside Gemini) ===
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+if OPENAI_API_KEY:
+    try:
+        from openai import OpenAI
+        CLIENTS.register("openai", lambda: OpenAI(api_key=OPENAI_API_KEY, timeout=LLM_TIMEOUT), warmup=lambda c: c.models.list())
+
+        def _openai_complete(prompt):
+            response = CLIENTS.get("openai").chat.completions.create(
+                model=OPENAI_MODEL, messages=[{"role": "user", "content": prompt}], max_tokens=400
+            )
+            return (response.choices[0].message.content or "").strip()
+
+        ROUTER.add("openai", _openai_complete)
+    except ImportError:
+        print("⚠️ OPENAI_API_KEY set but openai is not installed. Run: pip install openai")
+
+HAS_LLM = bool(ROUTER.providers)
+
 # === Load Knowledge Base ===
-KB_PATH = os.path.join(os.path.dirname(__file__), "kb.json")
+KB_DIR = os.path.dirname(__file__)
+KB_PATH = os.path.join(KB_DIR, "kb.json")
+# Compiled by `flask kb build`; when present and current, workers mmap it instead of parsing kb.json
+KB_SNAPSHOT_PATH = os.getenv("KB_SNAPSHOT_PATH", os.path.join(KB_DIR, "instance", "kb.snapshot"))
+# Answer languages stored per entry; `flask kb build` fills the gaps from answer_en
+KB_LANGS = tuple(dict.fromkeys(["en"] + [l.strip() for l in os.getenv("KB_LANGUAGES", "en,hi,ta,ml,te").split(",") if l.strip()]))
+# "google" (cached GoogleTranslator), "none", or "module:function" for a local translator
+KB_TRANSLATOR = os.getenv("KB_TRANSLATOR", "google")
 
-def load_kb():
-    if not os.path.exists(KB_PATH):
-        return {}
-    with open(KB_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def _kb_entry(keywords, row) -> Dict[str, Any]:
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    return {
+        "keywords": [k.strip() for k in keywords or [] if k and k.strip()],
+        "answers": {lang: row.get(f"answer_{lang}") or "" for lang in KB_LANGS},
+    }
 
-    out = {}
+# Answer columns the KB source files carry; the other KB_LANGS are filled in by `flask kb build`
+KB_SOURCE_LANGS = ("en", "hi", "ta")
+
+def kb_entry_key(entry) -> tuple:
+    """Content key used to drop duplicate entries (same keywords and source-language answers).
+
+    Translations added at build time don't count, so a CSV row still matches
+    its entry in a translated snapshot.
+    """
+    answers = ((lang, entry["answers"].get(lang)) for lang in KB_SOURCE_LANGS if entry["answers"].get(lang))
+    return (tuple(sorted(k.lower() for k in entry["keywords"])), tuple(answers))
+
+def kb_json_entry(entry) -> Dict[str, Any]:
+    """An entry in kb.json's on-disk shape."""
+    row = {"keywords": entry["keywords"]}
+    row.update((f"answer_{lang}", text) for lang, text in entry["answers"].items() if text or lang == "en")
+    return row
+
+def iter_csv_entries(path):
+    """Yield KB entries from a keywords,answer_en,answer_hi,... CSV one row at a time."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            entry = _kb_entry(row.get("keywords"), row)
+            if entry["keywords"]:
+                yield entry
+
+def kb_json_entries(data):
+    """KB entries from parsed kb.json content: a list of rows, or the older {keyword: answer(s)} dict."""
+    entries = []
     if isinstance(data, list):
         for entry in data:
-            keys = entry.get("keywords") or []
-            if isinstance(keys, str):
-                keys = [k.strip() for k in keys.split(",") if k.strip()]
-            for k in keys:
-                out[k.lower()] = {
-                    "en": entry.get("answer_en", ""),
-                    "hi": entry.get("answer_hi", ""),
-                    "ta": entry.get("answer_ta", "")
-                }
+            entries.append(_kb_entry(entry.get("keywords"), entry))
     elif isinstance(data, dict):
         for k, v in data.items():
             if isinstance(v, str):
-                out[k.lower()] = {"en": v}
+                entries.append({"keywords": [k], "answers": {"en": v}})
             elif isinstance(v, dict):
-                out[k.lower()] = {
-                    "en": v.get("answer_en", ""),
-                    "hi": v.get("answer_hi", ""),
-                    "ta": v.get("answer_ta", "")
-                }
+                entries.append(_kb_entry([k], v))
+    return entries
+
+def load_kb_entries():
+    """KB entries from the kb_*.csv seed files followed by kb.json, duplicates dropped.
+
+    kb.json comes last so that admin edits and imports, which only ever touch
+    kb.json, override seed answers and append in the same order a live
+    (incrementally extended) KB has them.
+    """
+    entries = []
+    for path in sorted(glob.glob(os.path.join(KB_DIR, "kb_*.csv"))):
+        entries.extend(iter_csv_entries(path))
+
+    if os.path.exists(KB_PATH):
+        with open(KB_PATH, "r", encoding="utf-8") as f:
+            entries.extend(kb_json_entries(json.load(f)))
+
+    seen, out = set(), []
+    for entry in entries:
+        key = kb_entry_key(entry)
+        if entry["keywords"] and key not in seen:
+            seen.add(key)
+            out.append(entry)
+    return out
+
+def kb_keyword_map(entries) -> Dict[str, Dict[str, str]]:
+    """keyword -> answers; a later entry wins a keyword but keeps its first position."""
+    out = {}
+    for entry in entries:
+        for k in entry["keywords"]:
+            out[k.lower()] = entry["answers"]
+    return out
+
+def load_kb():
+    return kb_keyword_map(load_kb_entries())
+
+def kb_sources():
+    """(name, mtime_ns, size) for every KB source file, used to spot a stale snapshot."""
+    paths = [KB_PATH] + sorted(glob.glob(os.path.join(KB_DIR, "kb_*.csv")))
+    out = []
+    for path in paths:
+        if os.path.exists(path):
+            st = os.stat(path)
+            out.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
     return out
 
-KB = load_kb()
+def kb_translator():
+    """The KB_TRANSLATOR callable (text, lang) -> translation, or None when unavailable."""
+    if KB_TRANSLATOR == "google":
+        if GoogleTranslator is None or not is_online():
+            return None
+        return lambda text, lang: cached_translate(text, lang, source="en")
+    return load_translator(KB_TRANSLATOR)
+
+def build_kb_artifact(path: str = None, translate: bool = True) -> str:
+    """Compile kb.json and the CSVs into the binary snapshot workers mmap.
+
+    With translate, every KB_LANGS answer missing from an entry is translated
+    from answer_en here, once, so a KB hit never needs a translation call.
+    Without it, no translator runs: unchanged entries keep the translations of
+    the snapshot already at path, which keeps rebuilds after admin edits cheap.
+    """
+    path = path or KB_SNAPSHOT_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sources = kb_sources()
+    entries = load_kb_entries()
+    if not translate:
+        carry_translations(entries, open_snapshot(path))
+    translator = kb_translator() if translate else None
+    if translator is not None:
+        filled, failed = fill_translations(entries, KB_LANGS, translator)
+        print(f"✅ KB answers translated: {filled} filled, {failed} failed")
+    elif translate:
+        print("⚠️ No KB translator available; missing answers will be translated per request.")
+    return write_snapshot(path, entries, KB_LANGS, sources)
+
+def carry_translations(entries, previous) -> int:
+    """Copy answers a previous snapshot already translated into entries with the same kb_entry_key."""
+    if previous is None:
+        return 0
+    known = {kb_entry_key(e): e["answers"] for e in previous.entries}
+    carried = 0
+    for entry in entries:
+        old = known.get(kb_entry_key(entry))
+        if not old:
+            continue
+        for lang, text in old.items():
+            if text and not entry["answers"].get(lang) and lang in entry["answers"]:
+                entry["answers"][lang] = text
+                carried += 1
+    return carried
+
+def save_kb(data):
+    """Write kb.json atomically so a concurrent reload never reads a half-written file."""
+    tmp_path = KB_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, KB_PATH)
+    if os.path.exists(KB_SNAPSHOT_PATH):
+        # keep the deployed snapshot in step so other workers can map it; translating is left to `flask kb build`
+        build_kb_artifact(translate=False)
+
+KBSnapshot = namedtuple("KBSnapshot", ["version", "entries", "index", "ranker", "speller"])
+
+def _kb_vocabulary(index, ranker):
+    """token -> document frequency over the KB, for typo correction."""
+    def vocabulary():
+        words = dict.fromkeys(index.vocabulary(), 1)
+        if ranker is not None:
+            words.update(ranker.vocabulary())
+        return words
+    return vocabulary
+
+def build_kb_snapshot(version: int) -> KBSnapshot:
+    mapped = open_snapshot(KB_SNAPSHOT_PATH)
+    if mapped is not None and mapped.sources == kb_sources() and mapped.meta["langs"] == list(KB_LANGS):
+        index, ranker, entries = mapped.index, mapped.ranker, mapped.entries
+    else:
+        entries = load_kb_entries()
+        # indexes are built once per load, never per request
+        index, ranker = KBIndex(kb_keyword_map(entries)), build_ranker(entries)
+    return KBSnapshot(version, entries, index, ranker, SymSpell(_kb_vocabulary(index, ranker)))
+
+def empty_kb_snapshot(version: int) -> KBSnapshot:
+    """A KB with no entries, served while kb.json or the snapshot can't be loaded."""
+    index = KBIndex({})
+    return KBSnapshot(version, [], index, None, SymSpell(_kb_vocabulary(index, None)))
+
+def extend_kb_snapshot(snapshot: KBSnapshot, new_entries, version: int) -> KBSnapshot:
+    """Snapshot with new_entries appended, reusing the existing keyword index."""
+    entries = list(snapshot.entries) + list(new_entries)
+    new_kb = kb_keyword_map(new_entries)
+    if isinstance(snapshot.index, KBIndex):
+        index = snapshot.index.extended(new_kb)
+    else:
+        index = KBIndex(kb_keyword_map(entries))
+    ranker = build_ranker(entries)  # idf is corpus-wide, so BM25 weights are recomputed
+    return KBSnapshot(version, entries, index, ranker, SymSpell(_kb_vocabulary(index, ranker)))
+
+def import_kb_csv(path):
+    """Stream a CSV into the KB, appending only entries it doesn't already hold.
+
+    Rows are read lazily and deduplicated on kb_entry_key against the live KB
+    and earlier rows of the same file. New or changed entries are appended to
+    kb.json in place, and the live index is extended instead of rebuilt.
+    Returns (added, skipped).
+    """
+    snapshot = KB_HOLDER.current()
+    seen = {kb_entry_key(e) for e in snapshot.entries}
+    new_entries, skipped = [], 0
+    for entry in iter_csv_entries(path):
+        key = kb_entry_key(entry)
+        if key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        new_entries.append(entry)
+    if not new_entries:
+        return 0, skipped
+
+    rows = [kb_json_entry(e) for e in new_entries]
+    if not (os.path.exists(KB_PATH) and append_json_array(KB_PATH, rows)):
+        existing = []
+        if os.path.exists(KB_PATH):
+            with open(KB_PATH, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        if not isinstance(existing, list):
+            existing = [kb_json_entry(e) for e in load_kb_entries()]
+        save_kb(existing + rows)
+        KB_HOLDER.reload(wait=True)
+    elif os.path.exists(KB_SNAPSHOT_PATH):
+        build_kb_artifact(translate=False)  # workers pick the recompiled snapshot up on their next poll
+        KB_HOLDER.reload(wait=True)
+    else:
+        KB_HOLDER.apply(lambda old, version: extend_kb_snapshot(old, new_entries, version))
+    return len(new_entries), skipped
+
+# Live KB: rebuilt in the background and swapped in when kb.json or the snapshot changes
+KB_HOLDER = KBHolder(
+    [KB_PATH, KB_SNAPSHOT_PATH], build_kb_snapshot,
+    poll_interval=float(os.getenv("KB_POLL_INTERVAL", "2")), fallback=empty_kb_snapshot,
+)
 
 # === Utility functions ===
-def is_online() -> bool:
-    """Check internet connectivity"""
+# host:port the connectivity probe connects to; a public DNS server by default
+PROBE_HOST, PROBE_PORT = os.getenv("CONNECTIVITY_PROBE_ADDR", "8.8.8.8:53").rsplit(":", 1)
+
+def probe_internet() -> bool:
+    """One TCP connect to CONNECTIVITY_PROBE_ADDR."""
     try:
-        socket.create_connection(("8.8.8.8", 53), timeout=3)
-        return True
+        with socket.create_connection((PROBE_HOST, int(PROBE_PORT)), timeout=3):
+            return True
     except OSError:
         return False
 
+# Probed in the background; requests read the cached state
+CONNECTIVITY = ConnectivityMonitor(
+    probe_internet,
+    interval=float(os.getenv("CONNECTIVITY_INTERVAL", "30")),
+    max_interval=float(os.getenv("CONNECTIVITY_MAX_INTERVAL", "300")),
+)
+
+def is_online() -> bool:
+    """Check internet connectivity (cached; probes inline only when the state is stale)."""
+    return CONNECTIVITY.is_online()
+
+# Script table first; langdetect only for Latin text that isn't plainly English
+LANGUAGE_DETECTOR = LanguageDetector(detect)
+
 def detect_language(text: str) -> str:
-    """Detect language using langdetect with Hindi heuristic."""
-    try:
-        lang = detect(text)
-        if re.search(r'[\u0900-\u097F]', text):  # Hindi characters
-            return 'hi'
-        return lang
-    except Exception:
-        return "en"
+    """Detect language from the Unicode script, falling back to langdetect."""
+    return LANGUAGE_DETECTOR(text)
 
 def translate_text(text: str, dest: str) -> str:
     """Translate text using Deep Translator (Google Translate backend)."""
     try:
-        return GoogleTranslator(source='auto', target=dest).translate(text)
+        return cached_translate(text, dest)
     except Exception as e:
         print("⚠️ Translation error:", e)
         return text
 
 # === KB Search ===
-def find_in_kb(message: str):
-    m = message.lower()
-    for k, v in KB.items():
-        if k in m:
-            return v
-    tokens = re.findall(r"\w+", m)
-    for k, v in KB.items():
-        ktoks = re.findall(r"\w+", k)
-        if any(t in ktoks for t in tokens if len(t) > 3):
-            return v
-    return None
+def find_in_kb(message: str, snapshot: KBSnapshot = None):
+    """Return the answers of the first KB keyword found in the message."""
+    snapshot = snapshot or KB_HOLDER.current()
+    return snapshot.index.lookup(message)
+
+# "bm25" ranks every entry; "keyword" keeps the first-match lookup above
+KB_RETRIEVAL = os.getenv("KB_RETRIEVAL", "bm25")
+# "memory" serves kb.json/snapshot; "sqlite" queries the knowledge_entries FTS5 table
+KB_BACKEND = os.getenv("KB_BACKEND", "memory")
+# Calibrated on the shipped KB with benchmarks/calibrate_kb_confidence.py; re-run it after large KB changes
+KB_MIN_CONFIDENCE = float(os.getenv("KB_MIN_CONFIDENCE", "0.4"))
+# a keyword found word for word that covers this much of the question is also confident
+KB_PHRASE_COVERAGE = float(os.getenv("KB_PHRASE_COVERAGE", "0.5"))
+# hits on entries with less than this share of the question's terms are not used at all
+KB_MIN_TERM_COVERAGE = float(os.getenv("KB_MIN_TERM_COVERAGE", "0.6"))
+# weak hits below this are never served, not even offline
+KB_WEAK_CONFIDENCE = float(os.getenv("KB_WEAK_CONFIDENCE", "0.25"))
+KB_RANK_DEPTH = 5
+
+def rank_kb(message: str, snapshot: KBSnapshot = None, k: int = 5):
+    """Top-k (entry, KBHit) pairs by BM25 score; empty when ranking is unavailable."""
+    snapshot = snapshot or KB_HOLDER.current()
+    if snapshot.ranker is None:
+        return []
+    return [(snapshot.entries[h.entry_id], h) for h in snapshot.ranker.search(message, k)]
+
+def search_kb(message: str, snapshot: KBSnapshot):
+    """Return (confident_answers, weak_answers) for the message.
+
+    A confident hit is answered straight from the KB. A weak hit is kept as a
+    last resort for when the LLM is unavailable. Without a confident hit the
+    search is retried once with typos corrected against the KB vocabulary.
+    """
+    return search_kb_many([message], snapshot)[0]
+
+def search_kb_many(messages, snapshot: KBSnapshot):
+    """search_kb for a batch of messages, resolved together in one ranking pass."""
+    results = _search_kb_exact_many(messages, snapshot)
+    retry = []
+    for j, (kb_item, _) in enumerate(results):
+        corrected = None if kb_item else snapshot.speller.correct(tokenize(messages[j]))
+        # a "correction" that merges two words ("price of rice" -> "rice of rice") is not a typo fix
+        if corrected and len(set(rank_tokens(" ".join(corrected)))) == len(set(rank_tokens(messages[j]))):
+            retry.append((j, " ".join(corrected)))
+    if retry:
+        # a guessed spelling must not turn a weak question into a confident wrong answer: it only
+        # counts when the entry contains every corrected term, and otherwise the original result stands
+        fixed = _search_kb_exact_many([text for _, text in retry], snapshot, term_coverage=1.0)
+        for (j, _), (kb_fixed, _) in zip(retry, fixed):
+            if kb_fixed:
+                results[j] = (kb_fixed, None)
+    return results
+
+def search_kb_store(message: str):
+    """(confident, weak) answers from the SQLite FTS5 store (needs an app context).
+
+    An entry containing every meaningful query term is confident; one that
+    only shares some of them is weak.
+    """
+    from database import search_knowledge
+    # drop stopwords but keep the raw spelling: FTS5 tokenizes native script its own way
+    query = " ".join(w for w in message.split() if normalize_text(w).strip("?.!,।") not in STOPWORDS) or message
+    hits = search_knowledge(query, limit=1, match_all=True)
+    if hits:
+        return hits[0][0].answers, None
+    hits = search_knowledge(query, limit=1)
+    return None, (hits[0][0].answers if hits else None)
+
+def _search_kb_exact_many(messages, snapshot: KBSnapshot, term_coverage=None):
+    if KB_BACKEND == "sqlite":
+        return [search_kb_store(m) for m in messages]
+    if KB_RETRIEVAL != "bm25" or snapshot.ranker is None:
+        return [(find_in_kb(m, snapshot), None) for m in messages]
+    results = []
+    for message, hits in zip(messages, snapshot.ranker.search_many(messages, k=KB_RANK_DEPTH)):
+        if not hits:
+            # nothing rankable (e.g. only stopwords like "how are you"): fall back to the
+            # keyword index, i.e. a KB phrase in the message or else a shared long token
+            results.append((find_in_kb(message, snapshot), None))
+            continue
+        qtoks = rank_tokens(message)
+        coverage = [phrase_coverage(snapshot.entries[h.entry_id], qtoks) for h in hits]
+        # an entry whose keyword is the whole question ("weather") beats a higher-scoring partial match
+        best = next((j for j, c in enumerate(coverage) if c >= 1.0), 0)
+        hit, answers = hits[best], snapshot.entries[hits[best].entry_id]["answers"]
+        if hit.coverage < (KB_MIN_TERM_COVERAGE if term_coverage is None else term_coverage):
+            # the entry shares only some of the question's terms ("fertilizer for rice" -> a rice
+            # disease): it scores well on the crop alone but answers another question
+            results.append((None, None))
+        elif hit.confidence >= KB_MIN_CONFIDENCE or coverage[best] >= KB_PHRASE_COVERAGE:
+            results.append((answers, None))
+        else:
+            results.append((None, answers if hit.confidence >= KB_WEAK_CONFIDENCE else None))
+    return results
 
 # === Gemini Fallback ===
+# Answers are reused for the same (or a near-identical) question in the same language and profile context
+RESPONSE_CACHE = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "2000")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "86400")),
+    similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0")) or None,
+)
+RESPONSE_CACHE_PROFILE_FIELDS = tuple(f.strip() for f in os.getenv("RESPONSE_CACHE_PROFILE_FIELDS", "primary_crop,region").split(",") if f.strip())
+
+def response_context(user_profile: Dict[str, Any], target_lang: str) -> tuple:
+    """What besides the question shapes a fallback answer (never the user id)."""
+    return (target_lang,) + tuple(str(user_profile.get(f) or "").strip().lower() for f in RESPONSE_CACHE_PROFILE_FIELDS)
+
+def gemini_prompt(user_profile: Dict[str, Any], message_text: str, target_lang: str) -> str:
+    # no user id: it means nothing to the model and would stop identical questions from coalescing
+    profile = {k: v for k, v in user_profile.items() if k != "id"}
+    return (
+        f"You are an expert agronomist chatbot.\n"
+        f"User profile: {profile}\n"
+        f"Question: {message_text}\n"
+        f"Respond naturally and fluently in {target_lang}. "
+        f"If the question is in Hindi or another language, reply in the same language."
+    )
+
+def routed_answer(prompt: str) -> str:
+    """Answer from the fastest healthy LLM provider; identical prompts in flight share one call."""
+    return GATEWAY.call(("llm", prompt), lambda: ROUTER.complete(prompt))
+
 def gemini_fallback(user_profile: Dict[str, Any], message_text: str, target_lang: str = "en") -> str:
-    """Use Gemini for online answers."""
-    if not HAS_GEMINI:
+    """Use Gemini (or another routed LLM provider) for online answers."""
+    if not HAS_LLM:
         return ""
 
+    context = response_context(user_profile, target_lang)
+    cached = RESPONSE_CACHE.get(message_text, context)
+    if cached:
+        return cached
+
     try:
-        prompt = (
-            f"You are an expert agronomist chatbot.\n"
-            f"User profile: {user_profile}\n"
-            f"Question: {message_text}\n"
-            f"Respond naturally and fluently in {target_lang}. "
-            f"If the question is in Hindi or another language, reply in the same language."
-        )
-        model = genai.GenerativeModel("gemini-2.0-flash-lite")
-        response = model.generate_content(prompt)
-        text = response.text.strip() if response and response.text else ""
+        text = routed_answer(gemini_prompt(user_profile, message_text, target_lang))
+        RESPONSE_CACHE.put(message_text, text, context)
         return text
     except Exception as e:
         print("⚠️ Gemini error:", e)
         return ""
 
+def gemini_stream(user_profile: Dict[str, Any], message_text: str, target_lang: str = "en"):
+    """gemini_fallback as a generator of text pieces, yielded as Gemini produces them.
+
+    Streams only when Gemini is the router's first choice; otherwise the
+    routed provider's answer is yielded whole.
+    """
+    if not HAS_LLM:
+        return
+    context = response_context(user_profile, target_lang)
+    cached = RESPONSE_CACHE.get(message_text, context)
+    if cached:
+        yield cached
+        return
+
+    prompt = gemini_prompt(user_profile, message_text, target_lang)
+    ranked = ROUTER.ranked()
+    if not ranked or ranked[0].name != "gemini" or not ranked[0].allow():
+        try:
+            text = routed_answer(prompt)
+        except Exception as e:
+            print("⚠️ LLM error:", e)
+            return
+        RESPONSE_CACHE.put(message_text, text, context)
+        yield text
+        return
+
+    provider, parts = ranked[0], []
+    try:
+        with GATEWAY.slot():
+            # only a call that reached Gemini counts for its circuit breaker
+            start = time.perf_counter()
+            try:
+                model = CLIENTS.get("gemini-chat")
+                for chunk in model.generate_content(prompt, stream=True, request_options=genai_request_options()):
+                    piece = chunk.text if chunk.parts else ""  # .text raises on an empty (e.g. final) chunk
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+            except Exception as e:
+                print("⚠️ Gemini stream error:", e)
+                return
+            finally:
+                provider.record(time.perf_counter() - start, bool(parts))
+    except GatewayBusy:
+        provider.release()
+        raise
+    RESPONSE_CACHE.put(message_text, "".join(parts).strip(), context)
+
 # === Main message processor ===
+EMPTY_MESSAGE_REPLY = "Please ask a question about crops, soil, or pests."
+OFFLINE_REPLY = "I’m currently offline. Please ask something simpler or try again when online."
+
+# Shared pool for the blocking network calls (translation, LLM) of a batch
+IO_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("CHAT_IO_WORKERS", "8")), thread_name_prefix="chat-io")
+
+def _run_unique(fn, calls):
+    """Run fn(*args) once per distinct args tuple, concurrently; returns {args: result}."""
+    unique = list(dict.fromkeys(calls))
+    if len(unique) <= 1:
+        return {args: fn(*args) for args in unique}
+    return dict(zip(unique, IO_POOL.map(lambda args: fn(*args), unique)))
+
 def process_message(user_profile: Dict[str, Any], message_text: str) -> str:
     """Main chatbot logic: offline + online hybrid mode with multilingual support."""
+    return process_messages(user_profile, [message_text])[0]
+
+def stream_message(user_profile: Dict[str, Any], message_text: str):
+    """process_message as a generator: KB replies come whole, Gemini replies piece by piece."""
+    deferred = []
+    reply = process_messages(user_profile, [message_text], defer_llm=deferred)[0]
+    if deferred:
+        _, text, lang = deferred[0]
+        streamed = False
+        try:
+            for piece in gemini_stream(user_profile, text, lang):
+                streamed = True
+                yield piece
+        except GatewayBusy as e:
+            print("⚠️ LLM busy:", e)
+        if streamed:
+            return
+    yield reply
+
+def process_messages(user_profile: Dict[str, Any], messages, defer_llm: list = None) -> list:
+    """Answer a batch of messages from one user, in input order.
+
+    Connectivity is checked once, every KB lookup goes through one ranking
+    pass, and identical translation / Gemini calls are made once and run
+    concurrently.
 
-    if not message_text or not message_text.strip():
-        return "Please ask a question about crops, soil, or pests."
+    With a defer_llm list, Gemini isn't called: (index, text, lang) for each
+    message that needs it is appended instead, and its reply is the one to
+    use if Gemini returns nothing.
+    """
+    replies = [None] * len(messages)
+    todo = []
+    for i, text in enumerate(messages):
+        if not text or not text.strip():
+            replies[i] = EMPTY_MESSAGE_REPLY
+        else:
+            todo.append(i)
+    if not todo:
+        return replies
+
+    # Pin one KB version for the whole request, even if a reload lands meanwhile
+    kb_snapshot = KB_HOLDER.current()
 
     # --- Debug info ---
-    online_status = is_online()
-    print("✅ Debug Info → Internet:", online_status, "| Gemini:", HAS_GEMINI)
+    print("✅ Debug Info → Internet:", CONNECTIVITY.online, "| LLM:", [p.name for p in ROUTER.providers])
 
     # 1️⃣ Detect user language
-    user_lang = detect_language(message_text)
-
-    # 2️⃣ Prepare text for KB search (always in English for consistency)
-    text_for_kb = message_text if user_lang == "en" else translate_text(message_text, "en")
-
-    # --- Try Knowledge Base first ---
-    kb_item = find_in_kb(text_for_kb)
-    if kb_item:
-        # Pick answer in user language if available
-        ans = kb_item.get(user_lang) or kb_item.get("en") or next(iter(kb_item.values()), "")
-        if user_lang != "en":
-            # Translate KB answer back to user's language if needed
-            ans = translate_text(ans, user_lang)
-        return ans
-
-    # --- If online & Gemini API key exists → use Gemini AI ---
-    if HAS_GEMINI and online_status:
-        try:
-            # Send original user text (not English translation) to Gemini
-            resp = gemini_fallback(user_profile, message_text, target_lang=user_lang)
-            if resp:
-                return resp
-        except Exception as e:
-            print("⚠️ Gemini failed:", e)
+    # repeated messages in a batch are detected once
+    detected = {}
+    for i in todo:
+        if messages[i] not in detected:
+            detected[messages[i]] = detect_language(messages[i])
+    langs = {i: detected[messages[i]] for i in todo}
+
+    # 2️⃣ Try the Knowledge Base in the user's own script first (native keywords)
+    found, weak = {}, {}
+    for i, (kb_item, weak_item) in zip(todo, search_kb_many([messages[i] for i in todo], kb_snapshot)):
+        if kb_item:
+            found[i] = kb_item
+        else:
+            weak[i] = weak_item
+
+    # 3️⃣ Native miss → translate to English and search again
+    need_en = [i for i in todo if i not in found and langs[i] != "en"]
+    if need_en:
+        english = _run_unique(translate_text, [(messages[i], "en") for i in need_en])
+        en_texts = [english[(messages[i], "en")] for i in need_en]
+        for i, (kb_item, weak_en) in zip(need_en, search_kb_many(en_texts, kb_snapshot)):
+            if kb_item:
+                found[i] = kb_item
+            else:
+                weak[i] = weak_en or weak[i]
+
+    # --- If online & Gemini API key exists → use Gemini AI for the rest ---
+    need_llm = [i for i in todo if i not in found]
+    # connectivity only matters once Gemini is actually needed
+    if need_llm and HAS_LLM and is_online() and defer_llm is not None:
+        defer_llm.extend((i, messages[i], langs[i]) for i in need_llm)
+    elif need_llm and HAS_LLM and is_online():
+        # Send original user text (not English translation) to Gemini
+        answers = _run_unique(
+            lambda text, lang: gemini_fallback(user_profile, text, target_lang=lang),
+            [(messages[i], langs[i]) for i in need_llm],
+        )
+        for i in need_llm:
+            replies[i] = answers[(messages[i], langs[i])] or None
+
+    # --- KB answers (low-confidence ones only when Gemini gave nothing) ---
+    picked = {}
+    for i in todo:
+        item = found.get(i) or (weak.get(i) if replies[i] is None else None)
+        if item:
+            picked[i] = item
+    need_translation = {}
+    for i, item in picked.items():
+        lang = langs[i]
+        if item.get(lang):
+            replies[i] = item[lang]
+        else:
+            ans = item.get("en") or next(iter(item.values()), "")
+            if lang != "en" and ans:
+                # Translate KB answer to user's language only when the KB lacks it
+                need_translation[i] = (ans, lang)
+            else:
+                replies[i] = ans
+    if need_translation:
+        translated = _run_unique(translate_text, need_translation.values())
+        for i, args in need_translation.items():
+            replies[i] = translated[args]
 
     # --- Offline fallback ---
-    return "I’m currently offline. Please ask something simpler or try again when online."
+    return [OFFLINE_REPLY if r is None else r for r in replies]
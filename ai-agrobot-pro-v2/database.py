@@ -1,5 +1,6 @@
-import os
+import os, re, json, hashlib
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text, inspect
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash
@@ -26,6 +27,229 @@ class ChatHistory(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     feedback = db.Column(db.String(20), nullable=True)
 
+# Answer columns of knowledge_entries; only the first three are part of an entry's content key
+KNOWLEDGE_LANGS = ("en", "hi", "ta", "ml", "te")
+KNOWLEDGE_KEY_LANGS = ("en", "hi", "ta")
+
+class KnowledgeEntry(db.Model):
+    __tablename__ = "knowledge_entries"
+    id = db.Column(db.Integer, primary_key=True)
+    keywords = db.Column(db.Text, nullable=False)  # comma-separated, as in the CSV imports
+    answer_en = db.Column(db.Text, default="")
+    answer_hi = db.Column(db.Text, default="")
+    answer_ta = db.Column(db.Text, default="")
+    answer_ml = db.Column(db.Text, default="")
+    answer_te = db.Column(db.Text, default="")
+    content_key = db.Column(db.String(64), unique=True, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def keyword_list(self):
+        return [k.strip() for k in (self.keywords or "").split(",") if k.strip()]
+
+    @property
+    def answers(self):
+        return {lang: getattr(self, f"answer_{lang}") or "" for lang in KNOWLEDGE_LANGS}
+
+    def refresh_key(self):
+        # ml/te are translations of the source answers, and rows keyed before they existed must keep their key
+        answers = {lang: getattr(self, f"answer_{lang}") or "" for lang in KNOWLEDGE_KEY_LANGS}
+        payload = json.dumps([sorted(k.lower() for k in self.keyword_list), answers], ensure_ascii=False, sort_keys=True)
+        self.content_key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def set_answers(self, answers):
+        for lang in KNOWLEDGE_LANGS:
+            setattr(self, f"answer_{lang}", answers.get(lang) or "")
+
+class ImageAnalysis(db.Model):
+    """Analysis result of one image, by SHA-256 of its bytes and the analyzer that produced it."""
+    __tablename__ = "image_analyses"
+    __table_args__ = (db.UniqueConstraint("content_hash", "analyzer_version"),)
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    analyzer_version = db.Column(db.String(40), nullable=False)
+    stored_name = db.Column(db.String(100))  # uploads/<sha>.<ext>, shared by every copy of the image
+    result = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def find_image_analysis(content_hash, analyzer_version):
+    """Stored result dict for this image and analyzer, or None."""
+    row = ImageAnalysis.query.filter_by(content_hash=content_hash, analyzer_version=analyzer_version).first()
+    return json.loads(row.result) if row else None
+
+def save_image_analysis(content_hash, analyzer_version, result, stored_name=None):
+    """Store a result; a concurrent upload of the same image may have stored it first, which is fine."""
+    db.session.add(ImageAnalysis(
+        content_hash=content_hash, analyzer_version=analyzer_version,
+        stored_name=stored_name, result=json.dumps(result, ensure_ascii=False),
+    ))
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+class AnalysisJob(db.Model):
+    """Background image analysis (Gemini vision); its row survives restarts so queued work is picked up again."""
+    __tablename__ = "analysis_jobs"
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    content_hash = db.Column(db.String(64), index=True)
+    filename = db.Column(db.String(200))
+    stored_name = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, default="")
+    status = db.Column(db.String(20), default="queued", index=True)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id, "status": self.status, "attempts": self.attempts,
+            "result": self.result, "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+# Full-text index over keywords and every KNOWLEDGE_LANGS answer, kept in sync by triggers (SQLite FTS5)
+_FTS_COLS = ["keywords"] + [f"answer_{lang}" for lang in KNOWLEDGE_LANGS]
+_FTS_NEW = ", ".join(f"new.{c}" for c in _FTS_COLS)
+_FTS_OLD = ", ".join(f"old.{c}" for c in _FTS_COLS)
+KNOWLEDGE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(
+        {", ".join(_FTS_COLS)},
+        content='knowledge_entries', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS knowledge_ai AFTER INSERT ON knowledge_entries BEGIN
+        INSERT INTO knowledge_fts(rowid, {", ".join(_FTS_COLS)})
+        VALUES (new.id, {_FTS_NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS knowledge_ad AFTER DELETE ON knowledge_entries BEGIN
+        INSERT INTO knowledge_fts(knowledge_fts, rowid, {", ".join(_FTS_COLS)})
+        VALUES ('delete', old.id, {_FTS_OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS knowledge_au AFTER UPDATE ON knowledge_entries BEGIN
+        INSERT INTO knowledge_fts(knowledge_fts, rowid, {", ".join(_FTS_COLS)})
+        VALUES ('delete', old.id, {_FTS_OLD});
+        INSERT INTO knowledge_fts(rowid, {", ".join(_FTS_COLS)})
+        VALUES (new.id, {_FTS_NEW});
+    END""",
+]
+# keyword matches weigh 10x answer text in any language
+KNOWLEDGE_FTS_WEIGHTS = ", ".join(["10.0"] + ["1.0"] * len(KNOWLEDGE_LANGS))
+
+def _drop_stale_knowledge_fts():
+    """Drop an FTS table (and its triggers) built for another column list; True when one was dropped."""
+    cols = [r[1] for r in db.session.execute(text("PRAGMA table_info(knowledge_fts)"))]
+    if not cols or cols == _FTS_COLS:
+        return False
+    for trigger in ("knowledge_ai", "knowledge_ad", "knowledge_au"):
+        db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    db.session.execute(text("DROP TABLE knowledge_fts"))
+    return True
+
+def init_knowledge_fts():
+    """Create the FTS5 table and sync triggers; False when the database can't host them.
+
+    A table from an older column list (before ml/te answers were indexed) is
+    recreated and rebuilt from knowledge_entries.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return False
+    try:
+        rebuild = _drop_stale_knowledge_fts()
+        for ddl in KNOWLEDGE_FTS_DDL:
+            db.session.execute(text(ddl))
+        if rebuild:
+            db.session.execute(text("INSERT INTO knowledge_fts(knowledge_fts) VALUES('rebuild')"))
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print("⚠️ FTS5 unavailable, knowledge search disabled:", e)
+        return False
+
+def add_knowledge_columns():
+    """Add answer columns introduced after knowledge_entries was created (create_all never alters tables)."""
+    have = {c["name"] for c in inspect(db.engine).get_columns("knowledge_entries")}
+    for lang in KNOWLEDGE_LANGS:
+        if f"answer_{lang}" not in have:
+            db.session.execute(text(f"ALTER TABLE knowledge_entries ADD COLUMN answer_{lang} TEXT DEFAULT ''"))
+    db.session.commit()
+
+def _knowledge_row(entry):
+    row = KnowledgeEntry(keywords=", ".join(entry["keywords"]))
+    row.set_answers(entry["answers"])
+    row.refresh_key()
+    return row
+
+def upsert_knowledge(entries):
+    """Insert KB entries ({"keywords": [...], "answers": {...}}) not already stored, in one transaction."""
+    existing = {k for (k,) in db.session.query(KnowledgeEntry.content_key)}
+    added = 0
+    for entry in entries:
+        row = _knowledge_row(entry)
+        if row.content_key in existing:
+            continue
+        existing.add(row.content_key)
+        db.session.add(row)
+        added += 1
+    db.session.commit()
+    return added
+
+def replace_knowledge(entries):
+    """Make the store hold exactly these entries, in one transaction; returns (added, removed).
+
+    Rows whose content is unchanged keep their id (their ml/te answers are
+    updated); the rest are deleted, and new entries inserted.
+    """
+    rows = {}
+    for entry in entries:
+        row = _knowledge_row(entry)
+        rows.setdefault(row.content_key, row)
+    added = removed = 0
+    try:
+        for stored in KnowledgeEntry.query.all():
+            row = rows.pop(stored.content_key, None)
+            if row is None:
+                db.session.delete(stored)
+                removed += 1
+            else:
+                stored.set_answers(row.answers)
+        db.session.flush()  # deletes first, so a re-added key never collides
+        for row in rows.values():
+            db.session.add(row)
+            added += 1
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return added, removed
+
+_FTS_TOKEN = re.compile(r"[\w\u0900-\u0963\u0966-\u0d7f]+")
+
+def search_knowledge(query, limit=5, match_all=False):
+    """Ranked full-text search; returns [(KnowledgeEntry, score)], best first.
+
+    Keyword matches weigh 10x answer text (in every stored language). With match_all every query term
+    must occur in the entry, otherwise any term may.
+    """
+    terms = ['"%s"' % t for t in _FTS_TOKEN.findall(query.lower())]
+    if not terms:
+        return []
+    sql = text(
+        f"SELECT rowid, bm25(knowledge_fts, {KNOWLEDGE_FTS_WEIGHTS}) AS score FROM knowledge_fts "
+        "WHERE knowledge_fts MATCH :q ORDER BY score LIMIT :limit"
+    )
+    try:
+        rows = db.session.execute(sql, {"q": (" AND " if match_all else " OR ").join(terms), "limit": limit}).all()
+    except Exception as e:
+        print("⚠️ Knowledge search error:", e)
+        return []
+    by_id = {e.id: e for e in KnowledgeEntry.query.filter(KnowledgeEntry.id.in_([r.rowid for r in rows]))}
+    return [(by_id[r.rowid], -r.score) for r in rows if r.rowid in by_id]
+
 def init_db(app):
     db_uri = os.getenv("DATABASE_URL", "sqlite:///agrobot.db")
     app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
@@ -33,6 +257,8 @@ def init_db(app):
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        add_knowledge_columns()
+        init_knowledge_fts()
         admin_email = os.getenv("ADMIN_EMAIL", "admin@agrobot.com")
         admin_password = os.getenv("ADMIN_PASSWORD", "Admin@123")
         if not User.query.filter_by(email=admin_email).first():
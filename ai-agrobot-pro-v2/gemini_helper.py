@@ -1,6 +1,10 @@
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
+from PIL import Image
+from utils.llm_clients import CLIENTS, genai_options, genai_request_options
+from utils.llm_gateway import GATEWAY
+from utils.llm_router import ROUTER
 
 load_dotenv()
 
@@ -9,54 +13,61 @@ API_KEY = os.getenv("GEMINI_API_KEY")
 if not API_KEY:
     print("❌ ERROR: GEMINI_API_KEY missing in .env")
 else:
-    genai.configure(api_key=API_KEY)
+    genai.configure(api_key=API_KEY, **genai_options())
 
-# ✅ Text Model
-try:
-    text_model = genai.GenerativeModel("gemini-pro")
-except Exception as e:
-    text_model = None
-    print("❌ Gemini Text Model Error:", e)
+# ✅ Text / Vision Models: created once per worker on first use, then reused
+CLIENTS.register("gemini-text", lambda: genai.GenerativeModel("gemini-pro"))
+GEMINI_VISION_MODEL = os.getenv("GEMINI_VISION_MODEL", "gemini-pro-vision")
+CLIENTS.register("gemini-vision", lambda: genai.GenerativeModel(GEMINI_VISION_MODEL))
 
-# ✅ Vision Model
-try:
-    vision_model = genai.GenerativeModel("gemini-pro-vision")
-except Exception as e:
-    vision_model = None
-    print("❌ Gemini Vision Model Error:", e)
+
+def _model(name):
+    try:
+        return CLIENTS.get(name)
+    except Exception as e:
+        print(f"❌ Gemini {name} model error:", e)
+        return None
 
 
 def ask_gemini(question):
-    """Ask Gemini text model."""
+    """Ask Gemini text model (through the provider router when it has providers)."""
     try:
+        if ROUTER.providers:
+            # fastest healthy provider; identical questions in flight share one call
+            return GATEWAY.call(("llm", question), lambda: ROUTER.complete(question))
+        text_model = _model("gemini-text")
         if not text_model:
             return "❌ Gemini text model not available."
-        response = text_model.generate_content(question)
-        return response.text
+        # concurrent identical questions share one upstream call
+        return GATEWAY.call(("gemini-text", question), lambda: text_model.generate_content(question, request_options=genai_request_options()).text)
     except Exception as e:
         print("❌ ask_gemini error:", e)
         return "Gemini API error."
 
 
-def analyze_with_gemini(image_path, user_text=""):
-    """Analyze plant images using Gemini vision model."""
-    try:
-        if not vision_model:
-            return "❌ Gemini vision model not available."
+def gemini_vision(image_path, user_text=""):
+    """Gemini vision analysis of a plant image; raises on any failure (for callers that retry)."""
+    vision_model = CLIENTS.get("gemini-vision")
 
-        prompt = (
-            "You are an agricultural expert. Analyze this plant image. "
-            "Identify disease, pest, nutrient deficiency and give treatment steps."
-        )
+    prompt = (
+        "You are an agricultural expert. Analyze this plant image. "
+        "Identify disease, pest, nutrient deficiency and give treatment steps."
+    )
 
-        if user_text:
-            prompt += f"\nUser question: {user_text}"
+    if user_text:
+        prompt += f"\nUser question: {user_text}"
 
-        image_obj = genai.Image.from_file(image_path)
+    with Image.open(image_path) as image_obj:
+        image_obj.load()
+        with GATEWAY.slot():
+            response = vision_model.generate_content([prompt, image_obj], request_options=genai_request_options())
+    return response.text
 
-        response = vision_model.generate_content([prompt, image_obj])
-        return response.text
 
+def analyze_with_gemini(image_path, user_text=""):
+    """Analyze plant images using Gemini vision model."""
+    try:
+        return gemini_vision(image_path, user_text)
     except Exception as e:
         print("❌ analyze_with_gemini error:", e)
         return "Image analysis failed."
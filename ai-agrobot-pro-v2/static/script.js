@@ -106,6 +106,14 @@ document.addEventListener('DOMContentLoaded', () => {
     }, 3000);
   }
 
+  // Convert markdown-style formatting to HTML with better styling
+  function formatMessageText(text) {
+    return text
+      .replace(/\*\*(.*?)\*\*/g, '<strong style="color: inherit; font-weight: 700;">$1</strong>')
+      .replace(/\*(.*?)\*/g, '<em style="font-style: italic;">$1</em>')
+      .replace(/\n/g, '<br>');
+  }
+
   function addMessage(who, text, imageData = null) {
     const el = document.createElement('div');
     el.className = 'message ' + who;
@@ -142,13 +150,7 @@ document.addEventListener('DOMContentLoaded', () => {
       const textElement = document.createElement('div');
       textElement.className = 'message-text';
 
-      // Convert markdown-style formatting to HTML with better styling
-      const formattedText = text
-        .replace(/\*\*(.*?)\*\*/g, '<strong style="color: inherit; font-weight: 700;">$1</strong>')
-        .replace(/\*(.*?)\*/g, '<em style="font-style: italic;">$1</em>')
-        .replace(/\n/g, '<br>');
-
-      textElement.innerHTML = formattedText;
+      textElement.innerHTML = formatMessageText(text);
       bubble.appendChild(textElement);
     }
 
@@ -163,6 +165,49 @@ document.addEventListener('DOMContentLoaded', () => {
     }, 10);
 
     messages.scrollTop = messages.scrollHeight;
+    return el;
+  }
+
+  // Render a Server-Sent Events reply from /api/chat piece by piece as it arrives
+  async function renderStream(res) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let textElement = null;
+
+    const show = (value) => {
+      if (!textElement) {
+        removeTypingIndicator();
+        textElement = addMessage('bot', value).querySelector('.message-text');
+      } else {
+        textElement.innerHTML = formatMessageText(value);
+      }
+      messages.scrollTop = messages.scrollHeight;
+    };
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const raw = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        const event = (raw.match(/^event: (.*)$/m) || [])[1];
+        const data = JSON.parse((raw.match(/^data: (.*)$/m) || [])[1] || '{}');
+
+        if (event === 'delta') {
+          text += data.text;
+          show(text);
+        } else if (event === 'done' || event === 'error') {
+          // the final reply is the sanitized text the server saved
+          show(data.response || text || 'No response received');
+        }
+      }
+    }
+    if (!textElement) show(text || 'No response received');
   }
 
   function showTypingIndicator() {
@@ -305,14 +350,21 @@ document.addEventListener('DOMContentLoaded', () => {
           headers: {
             'Content-Type': 'application/json'
           },
-          body: JSON.stringify({message: msg})
+          body: JSON.stringify({message: msg, stream: true})
         });
 
-        removeTypingIndicator();
+        if (!res.ok) {
+          removeTypingIndicator();
+          throw new Error('Network response not ok');
+        }
 
-        if (!res.ok) throw new Error('Network response not ok');
-        const data = await res.json();
-        addMessage('bot', data.response || 'No response received');
+        if ((res.headers.get('Content-Type') || '').startsWith('text/event-stream') && res.body) {
+          await renderStream(res);
+        } else {
+          removeTypingIndicator();
+          const data = await res.json();
+          addMessage('bot', data.response || 'No response received');
+        }
       }
 
     } catch (err) {
@@ -0,0 +1,4 @@
+import os, sys
+
+# tests import the app's modules (utils.*) the way app.py does, from ai-agrobot-pro-v2/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,30 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.chunked_translate import TranslationTimeout, translate_chunked
+
+
+def slow_upper(chunk):
+    time.sleep(0.1)
+    return chunk.upper()
+
+
+def test_single_chunk_runs_on_the_calling_thread():
+    threads = []
+    pool = ThreadPoolExecutor(1)
+    assert translate_chunked("hello", lambda c: threads.append(threading.current_thread()) or c.upper(), pool, 1) == "HELLO"
+    assert threads == [threading.current_thread()]
+
+
+def test_queue_wait_does_not_count_against_the_deadline():
+    pool = ThreadPoolExecutor(1)
+    pool.submit(time.sleep, 0.2)  # another request's chunk holds the only worker
+    assert translate_chunked("one. two.", slow_upper, pool, 0.25, limit=4) == "ONE. TWO."
+
+
+def test_slow_chunk_times_out():
+    pool = ThreadPoolExecutor(2)
+    with pytest.raises(TranslationTimeout):
+        translate_chunked("one. two.", slow_upper, pool, 0.05, limit=4)
@@ -0,0 +1,24 @@
+import os, signal
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.image_batch import BatchPool
+
+
+def die(_):
+    os._exit(1)
+
+
+def test_dead_worker_is_replaced():
+    pool = BatchPool(workers=1)
+    assert list(pool.map(abs, [-3])) == [(3, None)]
+    for pid in list(pool.pool()._processes):
+        os.kill(pid, signal.SIGKILL)
+    assert list(pool.map(abs, [-3, -4])) == [(3, None), (4, None)]
+    assert pool.stats()["restarts"] == 1
+
+
+def test_crashing_item_fails_alone():
+    pool = BatchPool(workers=1)
+    (result, error), = pool.map(die, [1])
+    assert result is None and isinstance(error, BrokenProcessPool)
+    assert list(pool.map(abs, [-5])) == [(5, None)]
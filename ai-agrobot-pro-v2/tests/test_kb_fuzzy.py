@@ -0,0 +1,38 @@
+import pytest
+
+from utils.kb_fuzzy import SymSpell
+
+VOCAB = {"rice": 12, "tomato": 20, "fertilizer": 9, "cotton": 7, "market": 1, "wheat": 8}
+KNOWN = frozenset({"price", "what"})
+
+
+def speller(**kw):
+    kw.setdefault("known", KNOWN)
+    return SymSpell(lambda: dict(VOCAB), **kw)
+
+
+def test_corrects_typos_outside_the_vocabulary():
+    assert speller().correct(["tomatto", "pests"]) == ["tomato", "pests"]
+    assert speller().suggest("fertlizer") == "fertilizer"
+
+
+def test_keeps_vocabulary_words():
+    assert speller().correct(["rice", "cotton", "market"]) is None
+
+
+def test_known_words_are_not_corrected():
+    sp = speller()
+    assert sp.suggest("price") is None  # one deletion away from "rice"
+    assert sp.correct(["price", "of", "rice"]) is None
+    assert sp.correct(["what", "price", "tomatto"]) == ["what", "price", "tomato"]
+
+
+def test_known_words_can_be_overridden():
+    assert speller(known=frozenset()).suggest("price") == "rice"
+
+
+def test_common_words_come_from_word_frequencies():
+    pytest.importorskip("wordfreq")
+    sp = SymSpell(lambda: dict(VOCAB))
+    assert sp.suggest("price") is None
+    assert sp.suggest("tomatto") == "tomato"
@@ -0,0 +1,37 @@
+import json
+
+from utils.kb_import import append_json_array
+
+
+def test_append_keeps_style_and_content(tmp_path):
+    path = tmp_path / "kb.json"
+    path.write_text(json.dumps([{"keywords": ["wheat"], "answer_en": "Sow in November."}], indent=2), encoding="utf-8")
+    assert append_json_array(str(path), [{"keywords": ["rice"], "answer_en": "Transplant in June."}])
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert [e["keywords"] for e in data] == [["wheat"], ["rice"]]
+    assert not (tmp_path / "kb.json.tmp").exists()
+
+
+def test_append_replaces_file_atomically(tmp_path):
+    path = tmp_path / "kb.json"
+    path.write_bytes(b'[\r\n  {"keywords": ["wheat"]}\r\n]')
+    before = path.stat().st_ino
+    assert append_json_array(str(path), [{"keywords": ["rice"]}])
+    assert path.stat().st_ino != before  # a new file was swapped in, not rewritten in place
+    raw = path.read_bytes()
+    assert b"\n" not in raw.replace(b"\r\n", b"")
+    assert len(json.loads(raw)) == 2
+
+
+def test_append_to_empty_array(tmp_path):
+    path = tmp_path / "kb.json"
+    path.write_text("[]", encoding="utf-8")
+    assert append_json_array(str(path), [{"keywords": ["rice"]}])
+    assert json.loads(path.read_text(encoding="utf-8")) == [{"keywords": ["rice"]}]
+
+
+def test_non_array_is_left_alone(tmp_path):
+    path = tmp_path / "kb.json"
+    path.write_text('{"wheat": "Sow in November."}', encoding="utf-8")
+    assert not append_json_array(str(path), [{"keywords": ["rice"]}])
+    assert path.read_text(encoding="utf-8") == '{"wheat": "Sow in November."}'
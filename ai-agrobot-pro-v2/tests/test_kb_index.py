@@ -0,0 +1,26 @@
+from utils.kb_index import KBIndex
+from utils.kb_rank import rank_tokens
+
+KB = {
+    "आप कैसे हैं": "greeting",
+    "நீங்கள் எப்படி இருக்கிறீர்கள்": "greeting",
+    "tomato": "tomato",
+    "बारिश": "rain",
+}
+
+
+def test_native_function_words_do_not_loose_match():
+    index = KBIndex(KB)
+    assert index.lookup("टमाटर में कीट नियंत्रण कैसे करें?") is None
+    assert index.lookup("தக்காளி பூச்சி எப்படி கட்டுப்படுத்துவது") is None
+
+
+def test_native_phrases_still_match():
+    index = KBIndex(KB)
+    assert index.lookup("आप कैसे हैं?") == "greeting"
+    assert index.lookup("நீங்கள் எப்படி இருக்கிறீர்கள்") == "greeting"
+    assert index.lookup("बारिश कब होगी") == "rain"
+
+
+def test_native_stopwords_are_not_ranked():
+    assert rank_tokens("जैविक खेती क्या है") == ["जैविक", "खेती"]
@@ -0,0 +1,42 @@
+import os, tempfile
+
+# rank the shipped kb.json directly and keep the translation cache out of instance/
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("KB_SNAPSHOT_PATH", os.path.join(_tmp, "kb.snapshot"))
+os.environ.setdefault("TRANSLATION_CACHE_PATH", os.path.join(_tmp, "translation_cache.db"))
+
+import chatbot_model as cm
+from utils.kb_rank import BM25Ranker
+
+ENTRIES = [
+    {"keywords": ["rice blight"], "answers": {"en": "Rice bacterial blight: spray copper on the rice crop."}},
+    {"keywords": ["fertilizer for paddy"], "answers": {"en": "Apply basal dose at transplanting."}},
+    {"keywords": ["cotton irrigation"], "answers": {"en": "Irrigate cotton every 10 days."}},
+]
+
+
+def test_hits_report_term_coverage():
+    top = BM25Ranker(ENTRIES).search("fertilizer for rice")[0]
+    assert top.entry_id == 0 and top.coverage == 0.5
+    assert BM25Ranker(ENTRIES).search("fertilizer for paddy")[0].coverage == 1.0
+
+
+def answer(question):
+    kb, weak = cm.search_kb_many([question], cm.KB_HOLDER.current())[0]
+    return (kb or {}).get("en"), (weak or {}).get("en")
+
+
+def test_crop_alone_is_not_an_answer():
+    assert answer("fertilizer for rice") == (None, None)
+    assert answer("pesticide for cotton") == (None, None)
+
+
+def test_whole_question_still_answers():
+    assert "basal dose" in answer("fertilizer for paddy")[0]
+    assert "Irrigate cotton" in answer("when should I water cotton")[0]
+
+
+def test_corrected_spelling_is_held_to_every_term():
+    assert "Plant tomatoes" in answer("when to plant tomatto")[0]
+    assert answer("pestiside for cotton") == (None, None)
+    assert answer("price of rice")[0] is None
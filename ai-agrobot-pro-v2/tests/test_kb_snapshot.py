@@ -0,0 +1,26 @@
+from utils.kb_snapshot import open_snapshot, write_snapshot
+
+ENTRIES = [
+    {"keywords": ["आप कैसे हैं", "நீங்கள் எப்படி இருக்கிறீர்கள்"], "answers": {"en": "I'm fine", "hi": "मैं ठीक हूँ", "ta": "நலம்"}},
+    {"keywords": ["tomato"], "answers": {"en": "Tomato care", "hi": "टमाटर", "ta": "தக்காளி"}},
+    {"keywords": ["बारिश"], "answers": {"en": "Rain", "hi": "बारिश", "ta": "மழை"}},
+]
+
+
+def mapped(tmp_path):
+    path = str(tmp_path / "kb.snapshot")
+    write_snapshot(path, ENTRIES, ["en", "hi", "ta"])
+    return open_snapshot(path)
+
+
+def test_native_function_words_do_not_loose_match(tmp_path):
+    index = mapped(tmp_path).index
+    assert index.lookup("टमाटर में कीट नियंत्रण कैसे करें?") is None
+    assert index.lookup("தக்காளி பூச்சி எப்படி கட்டுப்படுத்துவது") is None
+
+
+def test_native_phrases_still_match(tmp_path):
+    index = mapped(tmp_path).index
+    assert index.lookup("आप कैसे हैं?")["en"] == "I'm fine"
+    assert index.lookup("நீங்கள் எப்படி இருக்கிறீர்கள்")["en"] == "I'm fine"
+    assert index.lookup("बारिश कब होगी")["en"] == "Rain"
@@ -0,0 +1,40 @@
+from flask import Flask
+from sqlalchemy import text
+
+from database import db, init_db, init_knowledge_fts, search_knowledge, upsert_knowledge
+
+ENTRY = {"keywords": ["banana"], "answers": {"en": "Banana care", "ml": "വാഴ പരിചരണം", "te": "అరటి సంరక్షణ"}}
+
+# the FTS table as it was before ml/te answers were indexed
+OLD_FTS = [
+    "DROP TRIGGER knowledge_ai", "DROP TRIGGER knowledge_ad", "DROP TRIGGER knowledge_au", "DROP TABLE knowledge_fts",
+    "CREATE VIRTUAL TABLE knowledge_fts USING fts5(keywords, answer_en, answer_hi, answer_ta, "
+    "content='knowledge_entries', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO knowledge_fts(knowledge_fts) VALUES('rebuild')",
+]
+
+
+def make_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'kb.db'}")
+    app = Flask(__name__)
+    init_db(app)
+    return app
+
+
+def test_ml_and_te_answers_are_searchable(tmp_path, monkeypatch):
+    with make_app(tmp_path, monkeypatch).app_context():
+        upsert_knowledge([ENTRY])
+        assert search_knowledge("വാഴ")[0][0].answer_en == "Banana care"
+        assert search_knowledge("అరటి")[0][0].answer_en == "Banana care"
+
+
+def test_old_fts_table_is_rebuilt(tmp_path, monkeypatch):
+    with make_app(tmp_path, monkeypatch).app_context():
+        upsert_knowledge([ENTRY])
+        for sql in OLD_FTS:
+            db.session.execute(text(sql))
+        db.session.commit()
+        assert search_knowledge("വാഴ") == []
+        assert init_knowledge_fts()
+        assert search_knowledge("വാഴ")[0][0].answer_en == "Banana care"
+        assert search_knowledge("banana")[0][0].answer_ml == "വാഴ പരിചരണം"
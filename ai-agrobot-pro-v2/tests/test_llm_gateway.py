@@ -0,0 +1,25 @@
+import threading
+
+import pytest
+
+from utils.llm_gateway import GatewayBusy, LLMGateway
+
+
+def test_followers_give_up_on_a_hung_call():
+    gateway = LLMGateway(max_follow=0.1)
+    started, release = threading.Event(), threading.Event()
+
+    def hung():
+        started.set()
+        release.wait()
+        return "late"
+
+    leader = threading.Thread(target=gateway.call, args=("q", hung))
+    leader.start()
+    started.wait()
+    with pytest.raises(GatewayBusy):
+        gateway.call("q", lambda: "never runs")
+    release.set()
+    leader.join()
+    assert gateway.stats()["abandoned"] == 1
+    assert gateway.call("q", lambda: "fresh") == "fresh"
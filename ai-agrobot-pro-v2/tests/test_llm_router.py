@@ -0,0 +1,45 @@
+import pytest
+
+from utils.llm_gateway import GatewayBusy
+from utils.llm_router import LLMRouter, NoProviderAvailable
+
+
+def busy(prompt):
+    raise GatewayBusy("no slot")
+
+
+def broken(prompt):
+    raise RuntimeError("upstream 503")
+
+
+def test_gateway_busy_does_not_trip_the_breaker():
+    router = LLMRouter()
+    router.add("gemini", busy, failure_threshold=2)
+    for _ in range(5):
+        with pytest.raises(GatewayBusy):
+            router.complete("q")
+    provider = router.providers[0]
+    assert provider.state == "closed"
+    assert provider.stats()["calls"] == 0
+    assert provider.stats()["busy"] == 5
+
+
+def test_upstream_errors_open_the_circuit():
+    router = LLMRouter()
+    router.add("gemini", broken, failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(NoProviderAvailable):
+            router.complete("q")
+    assert router.providers[0].state == "open"
+
+
+def test_busy_half_open_trial_is_given_back():
+    router = LLMRouter()
+    router.add("gemini", broken, failure_threshold=1, cooldown=0)
+    with pytest.raises(NoProviderAvailable):
+        router.complete("q")
+    provider = router.providers[0]
+    provider.fn = busy
+    with pytest.raises(GatewayBusy):
+        router.complete("q")
+    assert provider.allow()  # the trial wasn't used up by the busy call
@@ -0,0 +1,58 @@
+from utils.response_cache import ResponseCache, question_signature
+
+
+def test_signature_ignores_order_and_filler():
+    assert question_signature("why are my tomato leaves yellow") == question_signature("Tomato leaves yellow, why?")
+
+
+def test_signature_keeps_question_words():
+    assert question_signature("how to sow wheat") != question_signature("when to sow wheat")
+
+
+def test_signature_keeps_negations():
+    assert question_signature("should I water tomato daily") != question_signature("should I not water tomato daily")
+    assert question_signature("don't spray urea on wheat") == question_signature("do not spray urea on wheat")
+
+
+def test_different_question_word_misses():
+    cache = ResponseCache()
+    cache.put("when to sow wheat", "Sow wheat in November.")
+    assert cache.get("how to sow wheat") is None
+    assert cache.get("When to sow wheat?") == "Sow wheat in November."
+
+
+def test_near_duplicates_are_opt_in():
+    cache = ResponseCache()
+    cache.put("best fertilizer for tomato plants", "NPK 19:19:19")
+    assert cache.get("best fertiliser for tomato plants") is None
+
+
+def test_near_duplicate_hit_when_enabled():
+    cache = ResponseCache(similarity=0.75)
+    cache.put("best fertilizer for tomato plants", "NPK 19:19:19")
+    assert cache.get("best fertiliser for tomato plants") == "NPK 19:19:19"
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_negated_question_is_not_a_near_hit():
+    cache = ResponseCache(similarity=0.75)
+    cache.put("should I irrigate wheat after sowing", "Yes, give a light irrigation.")
+    assert cache.get("should I not irrigate wheat after sowing") is None
+
+
+def test_question_word_change_is_not_a_near_hit():
+    cache = ResponseCache(similarity=0.5)
+    cache.put("when to spray neem oil on chilli", "Spray in the evening.")
+    assert cache.get("how to spray neem oil on chilli") is None
+
+
+def test_context_separates_answers():
+    cache = ResponseCache()
+    cache.put("when to sow wheat", "November", context=("en",))
+    assert cache.get("when to sow wheat", context=("hi",)) is None
+
+
+def test_native_negation_is_not_a_near_hit():
+    cache = ResponseCache(similarity=0.5)
+    cache.put("தக்காளிக்கு தினமும் தண்ணீர் ஊற்ற வேண்டுமா", "ஆம்")
+    assert cache.get("தக்காளிக்கு தினமும் தண்ணீர் ஊற்ற வேண்டாம்") is None
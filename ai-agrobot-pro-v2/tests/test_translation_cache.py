@@ -0,0 +1,28 @@
+import sqlite3
+
+from utils.translation_cache import TranslationCache
+
+
+def rows(path):
+    with sqlite3.connect(path) as conn:
+        return [k for (k,) in conn.execute("SELECT translation FROM translations ORDER BY created_at")]
+
+
+def test_disk_tier_keeps_newest_rows(tmp_path):
+    path = str(tmp_path / "tc.db")
+    cache = TranslationCache(path, max_rows=3, prune_every=2)
+    for i in range(6):
+        cache.put(f"text {i}", "en", "hi", f"t{i}")
+    assert rows(path) == ["t3", "t4", "t5"]
+    assert cache.stats()["disk_pruned"] == 3
+
+
+def test_disk_tier_is_pruned_at_startup(tmp_path):
+    path = str(tmp_path / "tc.db")
+    big = TranslationCache(path, max_rows=100)
+    for i in range(5):
+        big.put(f"text {i}", "en", "hi", f"t{i}")
+    small = TranslationCache(path, max_rows=2)
+    assert small.get("text 4", "en", "hi") == "t4"
+    assert small.get("text 0", "en", "hi") is None
+    assert rows(path) == ["t3", "t4"]
@@ -0,0 +1,83 @@
+import re, threading, time
+from concurrent.futures import wait
+
+MAX_CHUNK_CHARS = 4500  # Google Translate rejects requests over 5000 characters
+# Sentence ends (Latin and Devanagari danda) and line breaks, kept as separators
+_BOUNDARY = re.compile(r"((?<=[.!?।॥])\s+|\s*\n\s*)")
+
+
+class TranslationTimeout(Exception):
+    pass
+
+
+def split_chunks(text: str, limit: int = MAX_CHUNK_CHARS):
+    """Split text into (chunk, separator) pairs of at most limit characters.
+
+    Chunks break at sentence ends where possible; a single overlong sentence
+    is cut at its last space before the limit. ``"".join(c + s for c, s in
+    pairs) == text``, so separators (newlines especially, which the
+    translator would strip) survive reassembly.
+    """
+    parts = _BOUNDARY.split(text)
+    pieces = []
+    for i in range(0, len(parts), 2):
+        sentence, sep = parts[i], parts[i + 1] if i + 1 < len(parts) else ""
+        while len(sentence) > limit:
+            cut = sentence.rfind(" ", 0, limit)
+            if cut <= 0:
+                pieces.append((sentence[:limit], ""))
+                sentence = sentence[limit:]
+            else:
+                pieces.append((sentence[:cut], " "))
+                sentence = sentence[cut + 1:]
+        pieces.append((sentence, sep))
+
+    out, cur, cur_sep = [], None, ""
+    for sentence, sep in pieces:
+        if cur is not None and len(cur) + len(cur_sep) + len(sentence) > limit:
+            out.append((cur, cur_sep))
+            cur = None
+        cur = sentence if cur is None else cur + cur_sep + sentence
+        cur_sep = sep
+    out.append((cur, cur_sep))
+    return out
+
+
+def translate_chunked(text: str, translate_chunk, pool, deadline: float, limit: int = MAX_CHUNK_CHARS) -> str:
+    """Translate text chunk by chunk and reassemble the chunks in order.
+
+    Text that fits one chunk is translated inline on the calling thread, so
+    short replies never queue behind other requests' chunks (that call is
+    bounded only by the translator itself). Longer text is translated on
+    pool, where each chunk gets deadline seconds from the moment a worker
+    starts it, plus at most deadline seconds waiting for a worker.
+
+    Raises TranslationTimeout when a chunk misses either bound; chunks not
+    yet started are cancelled. An error from any chunk propagates.
+    """
+    pairs = split_chunks(text, limit)
+    todo = [i for i, (chunk, _) in enumerate(pairs) if chunk.strip()]
+    if len(todo) <= 1:
+        return "".join((translate_chunk(chunk) if chunk.strip() else chunk) + sep for chunk, sep in pairs)
+
+    started = {i: threading.Event() for i in todo}
+    begun = {}
+
+    def run(i):
+        begun[i] = time.monotonic()
+        started[i].set()
+        return translate_chunk(pairs[i][0])
+
+    futures = {i: pool.submit(run, i) for i in todo}
+    try:
+        for i, f in futures.items():
+            if not started[i].wait(deadline):
+                raise TranslationTimeout(f"chunk {i + 1}/{len(pairs)} waited {deadline:g}s for a translate worker")
+            done, _ = wait([f], timeout=max(0.0, begun[i] + deadline - time.monotonic()))
+            if not done:
+                raise TranslationTimeout(f"chunk {i + 1}/{len(pairs)} unfinished {deadline:g}s after it started")
+    except TranslationTimeout:
+        for f in futures.values():
+            f.cancel()
+        raise
+    return "".join((futures[i].result() if i in futures else chunk) + sep for i, (chunk, sep) in enumerate(pairs))
@@ -0,0 +1,73 @@
+import os, threading, time
+
+
+class ConnectivityMonitor:
+    """Cached internet reachability, refreshed by a background probe thread.
+
+    ``probe()`` returns True when online. It runs every ``interval`` seconds
+    while online; while offline the delay doubles up to ``max_interval`` so a
+    dead uplink isn't hammered. ``online`` is a plain attribute read, so
+    requests never wait on the network just to learn whether it's there.
+    ``is_online()`` is for callers about to use the network: it also re-probes
+    a stale state, and a known-offline state after ``interval`` seconds.
+    """
+
+    def __init__(self, probe, interval=30.0, max_interval=300.0):
+        self._probe = probe
+        self.interval = interval
+        self.max_interval = max_interval
+        self._delay = interval
+        self._lock = threading.Lock()
+        self._thread_pid = None
+        self._online = None  # unknown until the first probe
+        self.checked_at = 0.0
+        self.probes = 0
+
+    @property
+    def online(self):
+        """Last probe result (None before the first probe finishes)."""
+        self._ensure_thread()
+        return self._online
+
+    def is_online(self, max_age=None) -> bool:
+        """Cached state; probes inline only if it is unknown or older than max_age seconds."""
+        self._ensure_thread()
+        if max_age is None:
+            max_age = self.max_interval if self._online else self.interval
+        if self._online is None or time.monotonic() - self.checked_at > max_age:
+            return self.check()
+        return self._online
+
+    def check(self) -> bool:
+        """Probe now (one probe at a time; concurrent callers share its result)."""
+        started = time.monotonic()
+        with self._lock:
+            if self.checked_at >= started:
+                return self._online
+            try:
+                online = bool(self._probe())
+            except Exception:
+                online = False
+            self.probes += 1
+            if online != self._online:
+                print("🌐 Connectivity:", "online" if online else "offline")
+            self._online, self.checked_at = online, time.monotonic()
+            self._delay = self.interval if online else min(self._delay * 2, self.max_interval)
+        return online
+
+    def stats(self):
+        age = time.monotonic() - self.checked_at if self.checked_at else None
+        return {"online": self._online, "age_seconds": age and round(age, 1), "probes": self.probes, "next_delay": self._delay}
+
+    # === Internals ===
+    def _ensure_thread(self):
+        # threads don't survive a fork, so each gunicorn worker starts its own
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="connectivity", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self._delay)
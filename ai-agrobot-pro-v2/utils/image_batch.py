@@ -0,0 +1,111 @@
+import io, multiprocessing, os, threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+from utils.image_features import colour_ratios
+from utils.image_ingest import decode_for_analysis
+
+
+def analyze_image_bytes(data, size=(200, 200), green_margin=10):
+    """Decode and measure one image in a worker process; returns its colour ratios."""
+    return colour_ratios(decode_for_analysis(io.BytesIO(data), size), green_margin=green_margin)
+
+
+def _mp_context():
+    """forkserver where the platform has it (workers fork from a server that preloaded this module), else spawn."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class BatchPool:
+    """A ProcessPoolExecutor created on first use, once per process.
+
+    Workers are not forked from the web worker, so they don't inherit its
+    threads, sockets or database connections. Like any spawned child they
+    still re-run the entry script as ``__mp_main__`` before taking work, so
+    the script must not start anything when imported under that name.
+
+    A worker that dies (OOM kill, segfault in a decoder) breaks the whole
+    executor; it is replaced and the batch's outstanding images are retried
+    once before they are reported as failed.
+    """
+
+    def __init__(self, workers=None, in_flight=None):
+        self.workers = workers or os.cpu_count() or 2
+        self.in_flight = in_flight or 2 * self.workers
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = self.images = self.restarts = 0
+
+    def pool(self):
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=_mp_context())
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _restart(self, broken):
+        """Drop a broken executor; the next pool() call builds a fresh one."""
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def map(self, fn, items):
+        """fn over items in the worker processes; yields (result, None) or (None, error) in order.
+
+        items is consumed lazily and at most ``in_flight`` are submitted at a
+        time, so a large batch never holds all of its inputs in memory.
+        """
+        it, pending, started, retried = iter(items), deque(), False, False
+        while True:
+            for item in islice(it, self.in_flight - len(pending)):
+                pending.append((item, *self._submit(fn, item)))
+            if not pending:
+                return
+            if not started:
+                started = True
+                with self._lock:
+                    self.batches += 1
+            item, pool, future = pending[0]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                self._restart(pool)
+                if not retried:
+                    # every outstanding future died with the executor: resubmit them all once
+                    retried = True
+                    pending = deque((item, *self._submit(fn, item)) for item, _, _ in pending)
+                    continue
+                pending.popleft()
+                yield None, e
+            except Exception as e:
+                pending.popleft()
+                yield None, e
+            else:
+                pending.popleft()
+                yield result, None
+
+    def _submit(self, fn, item):
+        """(executor, future) for one item; a pool broken since the last batch is rebuilt first."""
+        pool = self.pool()
+        try:
+            future = pool.submit(fn, item)
+        except BrokenProcessPool:
+            self._restart(pool)
+            pool = self.pool()
+            future = pool.submit(fn, item)
+        with self._lock:
+            self.images += 1
+        return pool, future
+
+    def stats(self):
+        return {"workers": self.workers, "in_flight": self.in_flight, "started": self._pool is not None, "batches": self.batches, "images": self.images, "restarts": self.restarts}
@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    """Image analysis results keyed by (content hash, analyzer version).
+
+    An in-memory LRU sits in front of a persistent store given as two
+    callables, ``load(digest, version) -> result or None`` and
+    ``store(digest, version, result, stored_name)``. Bumping the analyzer
+    version makes older results unreachable without deleting them.
+    """
+
+    def __init__(self, load, store, max_entries=1024):
+        self.load = load
+        self.store = store
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = self.hits_store = self.misses = 0
+
+    def get(self, digest, version):
+        key = (digest, version)
+        with self._lock:
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+                self.hits_memory += 1
+                return result
+        result = self.load(digest, version)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits_store += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, digest, version, result, stored_name=None):
+        self.store(digest, version, result, stored_name)
+        with self._lock:
+            self._remember((digest, version), result)
+
+    def stats(self):
+        lookups = self.hits_memory + self.hits_store + self.misses
+        return {
+            "memory_entries": len(self._lru),
+            "hits_memory": self.hits_memory,
+            "hits_store": self.hits_store,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_store) / lookups, 3) if lookups else 0.0,
+        }
+
+    def _remember(self, key, result):
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
@@ -0,0 +1,59 @@
+import hashlib, shutil, tempfile
+from PIL import Image, ImageOps
+
+COPY_CHUNK = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def spool_upload(stream, max_bytes, memory_bytes=1024 * 1024):
+    """Copy an upload stream into a SpooledTemporaryFile; returns (spool rewound, SHA-256 hex of the bytes).
+
+    The hash is computed chunk by chunk as the upload is copied, so no
+    second read is needed. Uploads up to ``memory_bytes`` stay in memory;
+    larger ones roll over to an anonymous temp file that disappears when
+    closed. Raises UploadTooLarge past ``max_bytes``.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=memory_bytes)
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(COPY_CHUNK)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            spool.close()
+            raise UploadTooLarge(f"upload is over {max_bytes / (1024 * 1024):g} MB")
+        digest.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+def decode_for_analysis(fp, size=(200, 200)):
+    """Decode an image straight at analysis resolution, upright, as RGB of exactly ``size``.
+
+    JPEGs use draft mode, so libjpeg's DCT scaling decodes at 1/2, 1/4 or
+    1/8 scale (never below ``size``) instead of the full frame. Other formats
+    are shrunk with Image.reduce (via resize's reducing_gap) before the
+    final resample.
+    """
+    img = Image.open(fp)
+    swapped = img.getexif().get(0x0112) in (5, 6, 7, 8)  # EXIF orientation rotates by 90°
+    img.draft("RGB", (size[1], size[0]) if swapped else size)
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img.resize(size, reducing_gap=2.0)
+
+
+def persist_upload(spool, path):
+    """Write the spooled original to path (only called once the result is being kept)."""
+    spool.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(spool, out, COPY_CHUNK)
+    spool.seek(0)
+    return path
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """More than max_pending jobs are already waiting or running."""
+
+
+class JobQueue:
+    """Runs ``handler(job_id)`` on a bounded thread pool, off the request thread.
+
+    Job state lives wherever the handler keeps it (here: the analysis_jobs
+    table); the queue only tracks what this process has in hand, so a
+    restarted process re-submits unfinished jobs from that store. At most
+    ``workers`` jobs run at once, and ``submit`` refuses new work with
+    QueueFull once ``max_pending`` are queued or running.
+    """
+
+    def __init__(self, handler, workers=2, max_pending=100):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.submitted = self.completed = self.failed = 0
+
+    def submit(self, job_id):
+        with self._lock:
+            if job_id in self._pending:
+                return
+            if len(self._pending) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} analysis jobs already pending")
+            self._pending.add(job_id)
+            self.submitted += 1
+        self._pool.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            self.handler(job_id)
+            ok = True
+        except Exception as e:
+            print(f"⚠️ Analysis job {job_id} error:", e)
+            ok = False
+        with self._lock:
+            self._pending.discard(job_id)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -0,0 +1,123 @@
+import threading
+from functools import lru_cache
+
+MIN_WORD_LEN = 4  # shorter tokens are too ambiguous to correct
+
+try:
+    from wordfreq import top_n_list
+except ImportError:
+    top_n_list = None
+    print("⚠️ wordfreq not installed; typo correction may rewrite common words the KB doesn't use. Run: pip install wordfreq")
+
+COMMON_WORDS_TOP_N = 10000
+
+
+@lru_cache(maxsize=None)
+def common_words(lang="en", n=COMMON_WORDS_TOP_N) -> frozenset:
+    """The n most frequent words of the language, per wordfreq (empty without it).
+
+    These are correctly spelled words a farmer's question may contain that the
+    KB never uses; they are never "corrected", so "price of onion" doesn't turn
+    into "rice of onion".
+    """
+    if top_n_list is None:
+        return frozenset()
+    return frozenset(top_n_list(lang, n))
+
+
+def max_edits(word: str) -> int:
+    """Edit budget for a word: one typo for short words, two for longer ones."""
+    return 1 if len(word) <= 5 else 2
+
+
+def _deletes(word: str, depth: int) -> set:
+    """Every string reachable from word by removing up to depth characters."""
+    out, frontier = set(), {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment distance (adjacent swaps cost 1); limit + 1 once exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SymSpell:
+    """Symmetric-delete spelling corrector over the KB vocabulary.
+
+    Every vocabulary word is stored under all its deletions (up to its edit
+    budget). A typo meets its correction at a shared deletion, so a lookup
+    costs O(deletions of the query word) dictionary probes plus a few
+    bounded distance checks, independent of vocabulary size.
+
+    ``vocabulary`` is a callable returning {word: frequency}. It runs on the
+    first lookup, so building the tables never slows down KB startup. Only
+    words in neither the vocabulary nor ``known`` (default: common_words(),
+    loaded with the tables) are treated as typos.
+    """
+
+    def __init__(self, vocabulary, known=None):
+        self._vocabulary = vocabulary
+        self._known = known
+        self._lock = threading.Lock()
+        self._words = None
+        self._index = None
+
+    def _build(self):
+        with self._lock:
+            if self._index is not None:
+                return
+            if self._known is None:
+                self._known = common_words()
+            words = {w: f for w, f in self._vocabulary().items() if len(w) >= MIN_WORD_LEN and w.isalpha()}
+            index = {}
+            for w in words:
+                for d in _deletes(w, max_edits(w)) | {w}:
+                    index.setdefault(d, []).append(w)
+            self._words, self._index = words, index
+
+    def suggest(self, word: str):
+        """Closest vocabulary word within the edit budget, or None."""
+        if self._index is None:
+            self._build()
+        if word in self._words or word in self._known or len(word) < MIN_WORD_LEN or not word.isalpha():
+            return None
+        limit = max_edits(word)
+        best, best_key = None, None
+        seen = set()
+        for d in _deletes(word, limit) | {word}:
+            for cand in self._index.get(d, ()):
+                if cand in seen:
+                    continue
+                seen.add(cand)
+                dist = edit_distance(word, cand, limit)
+                if dist > limit:
+                    continue
+                key = (dist, -self._words[cand], cand)  # nearest, then most common
+                if best_key is None or key < best_key:
+                    best, best_key = cand, key
+        return best
+
+    def correct(self, tokens):
+        """Tokens with typos replaced, or None when nothing was corrected."""
+        out, changed = [], False
+        for t in tokens:
+            fix = self.suggest(t)
+            out.append(fix or t)
+            changed = changed or fix is not None
+        return out if changed else None
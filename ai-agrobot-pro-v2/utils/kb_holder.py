@@ -0,0 +1,118 @@
+import os, threading, time
+
+
+class KBHolder:
+    """Holds the live KB snapshot and swaps in a rebuilt one when a watched file changes.
+
+    ``builder(version)`` must return a fresh, immutable snapshot object. Readers
+    grab one snapshot per request via ``current()`` and keep using it, so a swap
+    never changes the data under a request that is already running. If the
+    first build fails (e.g. a corrupt kb.json), ``fallback(version)`` is served
+    until a changed file rebuilds cleanly.
+    """
+
+    def __init__(self, paths, builder, poll_interval=2.0, fallback=None):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.poll_interval = poll_interval
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._last_check = time.monotonic()
+        self._watcher_pid = None
+        self._stamp = self._file_stamp()
+        try:
+            self._snapshot = builder(1)
+        except Exception as e:
+            if fallback is None:
+                raise
+            print("⚠️ KB load failed, starting with an empty KB:", e)
+            self._snapshot = fallback(1)
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def current(self):
+        """Return the live snapshot, checking the watched files at most once per poll interval."""
+        self._ensure_watcher()
+        if time.monotonic() - self._last_check >= self.poll_interval:
+            self.check()
+        return self._snapshot
+
+    def check(self) -> bool:
+        """Start a background rebuild if a watched file changed since the last build."""
+        self._last_check = time.monotonic()
+        if self._file_stamp() == self._stamp:
+            return False
+        return self._start_rebuild()
+
+    def reload(self, wait=False):
+        """Admin-triggered rebuild; with wait=True the new snapshot is live on return."""
+        if wait:
+            self._rebuild()
+        else:
+            self._start_rebuild()
+        return self._snapshot
+
+    def apply(self, update):
+        """Swap in ``update(current_snapshot, next_version)``, e.g. an incremental extension.
+
+        The watched files' stamps are refreshed too, so the write that went
+        with the update doesn't trigger a redundant full rebuild here.
+        """
+        with self._build_lock:
+            snapshot = update(self._snapshot, self._snapshot.version + 1)
+            self._snapshot = snapshot
+            self._stamp = self._file_stamp()
+        return snapshot
+
+    # === Internals ===
+    def _file_stamp(self):
+        stamps = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _start_rebuild(self) -> bool:
+        with self._lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, args=(True,), name="kb-rebuild", daemon=True).start()
+        return True
+
+    def _rebuild(self, background=False):
+        try:
+            with self._build_lock:
+                stamp = self._file_stamp()
+                snapshot = self._builder(self._snapshot.version + 1)
+                # single reference assignment: readers see either the old or the new snapshot
+                self._snapshot = snapshot
+                self._stamp = stamp
+            print(f"🔄 KB reloaded → version {snapshot.version}")
+        except Exception as e:
+            print("⚠️ KB reload failed, keeping previous version:", e)
+        finally:
+            if background:
+                with self._lock:
+                    self._rebuilding = False
+
+    def _ensure_watcher(self):
+        # threads don't survive a fork, so each gunicorn worker starts its own
+        if self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name="kb-watcher", daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.check()
+            except Exception as e:
+                print("⚠️ KB watcher error:", e)
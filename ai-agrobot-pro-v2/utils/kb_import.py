@@ -0,0 +1,55 @@
+import json, os
+
+_TAIL = 4096  # the closing bracket is always within the last few bytes
+
+
+def _indent(text: str, prefix: str, newline: str) -> str:
+    return newline.join(prefix + line for line in text.split("\n"))
+
+
+def append_json_array(path, items) -> bool:
+    """Append items to the JSON array in path without re-parsing what is already there.
+
+    The existing bytes are streamed into a temp file, the new objects follow in
+    the file's own style (indent=2, same line endings), and the temp file then
+    replaces path atomically, as save_kb does, so a reader or a crash never
+    sees a half-written array. Returns False when the file is not a JSON
+    array, so the caller can fall back to a full rewrite.
+    """
+    items = list(items)
+    if not items:
+        return True
+    with open(path, "rb") as src:
+        if not src.read(64).lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"["):
+            return False
+        size = src.seek(0, os.SEEK_END)
+        src.seek(max(0, size - _TAIL))
+        tail = src.read()
+        close = tail.rfind(b"]")
+        if close < 0 or tail[close + 1:].strip():
+            return False
+        body = tail[:close].rstrip()
+        newline = "\r\n" if b"\r\n" in tail else "\n"
+        sep = b"" if body.endswith(b"[") else b","
+        chunk = ",".join(
+            newline + _indent(json.dumps(item, ensure_ascii=False, indent=2), "  ", newline)
+            for item in items
+        )
+        tmp_path = path + ".tmp"
+        src.seek(0)
+        with open(tmp_path, "wb") as dst:
+            _copy_bytes(src, dst, size - len(tail) + len(body))
+            dst.write(sep + chunk.encode("utf-8") + (newline + "]").encode("utf-8"))
+            dst.flush()
+            os.fsync(dst.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+def _copy_bytes(src, dst, n, block=1 << 20):
+    while n > 0:
+        data = src.read(min(block, n))
+        if not data:
+            break
+        dst.write(data)
+        n -= len(data)
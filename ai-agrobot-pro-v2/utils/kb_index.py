@@ -0,0 +1,167 @@
+import re, unicodedata
+from collections import deque
+
+# \w alone splits Indic words at every vowel sign/virama, so include the
+# Devanagari..Malayalam blocks (minus the danda punctuation) as word characters
+TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u0d7f]+")
+MIN_TOKEN_LEN = 4  # tokens shorter than this (or in NATIVE_STOPWORDS) never trigger the loose token match
+
+# Spelling variants that should not change a match: nukta dots, virama/halant
+# (incl. Tamil pulli) and the zero-width joiners used to force conjunct shapes
+_IGNORED_MARKS = dict.fromkeys(map(ord,
+    "\u093c\u09bc\u0a3c\u0abc\u0b3c\u0cbc"                     # nukta
+    "\u094d\u09cd\u0a4d\u0acd\u0b4d\u0bcd\u0c4d\u0ccd\u0d4d"  # virama
+    "\u200c\u200d"                                              # ZWNJ / ZWJ
+))
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase NFC text with nukta, virama and joiner variants removed."""
+    # NFD first so precomposed nukta letters (e.g. क़) lose their nukta too
+    text = unicodedata.normalize("NFD", text).translate(_IGNORED_MARKS)
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def tokenize(text: str):
+    """Split text into normalized word tokens in any script."""
+    return TOKEN_RE.findall(normalize_text(text))
+
+
+# Hindi and Tamil question words, pronouns, auxiliaries and postpositions. They are
+# long enough for the loose token match, where "कैसे" would otherwise pull up "आप कैसे हैं"
+NATIVE_STOPWORDS = frozenset(tokenize(
+    "का के की को में से पर तक है हैं था थे थी हो होता होती होते होगा कर करें करे करना करने "
+    "कैसे क्या क्यों कब कहाँ कहां कौन कौनसा कितना कितनी कितने किस किसी मैं मेरा मेरी मेरे मुझे "
+    "हम हमें हमारा आप आपका आपकी तुम यह ये वह वे इस उस इसे उसे और या भी तो ही लिए बताओ बताइए "
+    "बताएं चाहिए सकता सकती सकते जाता जाती जाते रहा रही रहे अपना अपनी अपने कोई कुछ जब तब अब "
+    "என்ன எப்படி எப்போது ஏன் எங்கே எது எந்த யார் எவ்வளவு எத்தனை நான் என் எனக்கு என்னுடைய "
+    "நாங்கள் நாம் நீங்கள் உங்கள் உங்களுக்கு நீ அது இது அந்த இந்த மற்றும் அல்லது ஆகும் உள்ளது "
+    "உள்ளன இருக்கிறது இருக்கிறீர்கள் இருக்கும் இருந்து செய்ய செய்வது வேண்டும் முடியும் "
+    "கொண்டு பற்றி சொல்லுங்கள் சொல்லு ஒரு"
+))
+
+
+class KBIndex:
+    """Prebuilt lookup structures over the keyword -> answer KB.
+
+    Keywords keep their dict insertion order as a priority, so a lookup returns
+    the same entry the old linear scan would have returned first:
+
+    * phrases: a token-level Aho-Corasick automaton over every keyword. A match
+      means the keyword appears in the message on word boundaries.
+    * postings: token -> keyword positions, for the loose "shares a long
+      token" fallback.
+    """
+
+    def __init__(self, kb: dict):
+        self.keywords = list(kb.keys())
+        self.entries = [kb[k] for k in self.keywords]
+        self.postings = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # lowest keyword position ending at each node (incl. fail chain)
+
+        for pos, keyword in enumerate(self.keywords):
+            self._add(keyword, pos)
+        self._link()
+
+    def extended(self, kb: dict) -> "KBIndex":
+        """A new index with kb's keywords added; this one is left untouched.
+
+        Only the new keywords are tokenized and inserted. Keywords that already
+        exist keep their position but take the new answers, as in load order.
+        """
+        new = object.__new__(KBIndex)
+        new.keywords, new.entries = list(self.keywords), list(self.entries)
+        new.postings = dict(self.postings)  # lists are replaced, never mutated, in _add
+        new._goto = [dict(g) for g in self._goto]
+        new._fail, new._best = list(self._fail), list(self._best)
+        positions = {k: i for i, k in enumerate(self.keywords)}
+        for keyword, answers in kb.items():
+            pos = positions.get(keyword)
+            if pos is None:
+                pos = positions[keyword] = len(new.keywords)
+                new.keywords.append(keyword)
+                new.entries.append(answers)
+                new._add(keyword, pos)
+            else:
+                new.entries[pos] = answers
+        new._link()
+        return new
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def vocabulary(self):
+        """Every token that occurs in a keyword."""
+        return self.postings.keys()
+
+    # === Automaton construction ===
+    def _add(self, keyword, pos):
+        toks = tokenize(keyword)
+        if not toks:
+            return
+        self._insert(toks, pos)
+        for t in set(toks):
+            self.postings[t] = self.postings.get(t, []) + [pos]
+
+    def _insert(self, toks, pos):
+        node = 0
+        for t in toks:
+            nxt = self._goto[node].get(t)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][t] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            node = nxt
+        if self._best[node] is None or pos < self._best[node]:
+            self._best[node] = pos
+
+    def _link(self):
+        """Compute failure links breadth-first and fold outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for t, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and t not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(t, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    # === Lookup ===
+    def match_phrase(self, tokens):
+        """Lowest keyword position whose phrase occurs in tokens, or None."""
+        best = None
+        node = 0
+        for t in tokens:
+            while node and t not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(t, 0)
+            hit = self._best[node]
+            if hit is not None and (best is None or hit < best):
+                best = hit
+        return best
+
+    def match_token(self, tokens):
+        """Lowest keyword position sharing a long token with tokens, or None."""
+        best = None
+        for t in tokens:
+            if len(t) < MIN_TOKEN_LEN or t in NATIVE_STOPWORDS:
+                continue
+            plist = self.postings.get(t)
+            if plist and (best is None or plist[0] < best):
+                best = plist[0]
+        return best
+
+    def lookup(self, message: str):
+        tokens = tokenize(message)
+        pos = self.match_phrase(tokens)
+        if pos is None:
+            pos = self.match_token(tokens)
+        return None if pos is None else self.entries[pos]
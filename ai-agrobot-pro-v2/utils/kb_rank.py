@@ -0,0 +1,168 @@
+from collections import Counter, namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    print("⚠️ NumPy not installed; ranked KB retrieval disabled. Run: pip install numpy")
+
+from utils.kb_index import tokenize, NATIVE_STOPWORDS
+
+KBHit = namedtuple("KBHit", ["entry_id", "score", "confidence", "coverage"])
+
+KEYWORD_BOOST = 2  # keyword tokens count this many times against answer text
+STOPWORDS = frozenset(
+    "a an and are about at be by can do does for from how i in is it me my of on or "
+    "should tell the to what when which why with you your".split()
+) | NATIVE_STOPWORDS
+
+
+def rank_tokens(text: str) -> list:
+    return [t for t in tokenize(text) if t not in STOPWORDS]
+
+
+def phrase_coverage(entry, qtoks) -> float:
+    """Share of the query's rank tokens covered by the longest entry keyword found in it word for word."""
+    best = 0
+    for k in entry.get("keywords") or []:
+        kt = rank_tokens(k)
+        n = len(kt)
+        if n > best and any(qtoks[i:i + n] == kt for i in range(len(qtoks) - n + 1)):
+            best = n
+    return best / len(qtoks) if qtoks else 0.0
+
+
+def entry_tokens(entry) -> list:
+    """Tokens BM25 sees for one KB entry: boosted keywords plus the English answer."""
+    toks = []
+    for k in entry.get("keywords") or []:
+        toks.extend(rank_tokens(k))
+    toks *= KEYWORD_BOOST
+    toks.extend(rank_tokens(entry.get("answers", {}).get("en") or ""))
+    return toks
+
+
+class BM25Ranker:
+    """Okapi BM25 over KB entries, stored as a term-major sparse matrix.
+
+    Postings live in three flat arrays (CSR layout): ``indptr`` slices
+    ``doc_ids``/``weights`` per term, and every weight already folds in idf and
+    length normalisation, so scoring a query is a single ``np.bincount``.
+    """
+
+    def __init__(self, entries, k1=1.5, b=0.75):
+        self.k1, self.b = k1, b
+        self.n_docs = len(entries)
+        self.vocab = {}
+        term_col, doc_col, tf_col = [], [], []
+        doc_len = []
+        for d, entry in enumerate(entries):
+            toks = entry_tokens(entry)
+            doc_len.append(len(toks))
+            for t, c in Counter(toks).items():
+                term_col.append(self.vocab.setdefault(t, len(self.vocab)))
+                doc_col.append(d)
+                tf_col.append(c)
+
+        terms = np.asarray(term_col, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        terms = terms[order]
+        self.doc_ids = np.asarray(doc_col, dtype=np.int32)[order]
+        tf = np.asarray(tf_col, dtype=np.float32)[order]
+
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.vocab)), out=self.indptr[1:])
+
+        df = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self.max_idf = float(np.log1p((self.n_docs + 0.5) / 0.5))
+
+        dl = np.asarray(doc_len, dtype=np.float32)
+        avgdl = float(dl.mean()) if self.n_docs else 1.0
+        norm = k1 * (1.0 - b + b * dl[self.doc_ids] / max(avgdl, 1.0))
+        self.weights = (self.idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    @classmethod
+    def from_arrays(cls, vocab, indptr, doc_ids, weights, idf, max_idf, n_docs, k1=1.5, b=0.75):
+        """Wrap precomputed arrays (e.g. views into a mapped KB snapshot) without copying.
+
+        ``vocab`` only needs a ``get(token)`` returning the term id or None.
+        """
+        self = cls.__new__(cls)
+        self.k1, self.b = k1, b
+        self.n_docs = n_docs
+        self.vocab = vocab
+        self.indptr, self.doc_ids, self.weights, self.idf = indptr, doc_ids, weights, idf
+        self.max_idf = max_idf
+        return self
+
+    def vocabulary(self):
+        """(token, document frequency) for every ranked term."""
+        df = np.diff(self.indptr)
+        if isinstance(self.vocab, dict):
+            return ((t, int(df[tid])) for t, tid in self.vocab.items())
+        return ((self.vocab[tid], int(df[tid])) for tid in range(len(self.vocab)) if df[tid])
+
+    def search(self, query: str, k: int = 5):
+        """Top-k entries for the query as KBHit tuples, best first.
+
+        ``confidence`` is the score divided by the best score any entry could
+        reach if it contained every query term, so it is comparable across
+        queries. Terms the KB has never seen count at the maximum idf, which
+        keeps off-topic questions below the threshold. ``coverage`` is the share
+        of the query's terms the entry contains at all, so a hit on the crop
+        alone ("fertilizer for rice" -> a rice disease) can be told apart from
+        one that answers the whole question.
+        """
+        return self.search_many([query], k)[0]
+
+    def search_many(self, queries, k: int = 5):
+        """search() for a batch of queries, scored together as one sparse-dense product.
+
+        Every (query, posting) pair is flattened into ``query * n_docs + doc`` and
+        summed with a single ``np.bincount`` into a queries x docs score matrix.
+        """
+        n_q = len(queries)
+        if not n_q or not self.n_docs:
+            return [[] for _ in range(n_q)]
+        flat, weights = [], []
+        ideal = np.zeros(n_q, dtype=np.float64)
+        n_terms = np.zeros(n_q, dtype=np.float64)
+        for qi, query in enumerate(queries):
+            qtoks = set(rank_tokens(query))
+            n_terms[qi] = len(qtoks)
+            tids = sorted(tid for tid in map(self.vocab.get, qtoks) if tid is not None)
+            unseen = len(qtoks) - len(tids)
+            ideal[qi] = (float(self.idf[tids].sum()) + unseen * self.max_idf) * (self.k1 + 1.0)
+            for t in tids:
+                s = slice(self.indptr[t], self.indptr[t + 1])
+                flat.append(self.doc_ids[s].astype(np.int64) + qi * self.n_docs)
+                weights.append(self.weights[s])
+        if not flat:
+            return [[] for _ in range(n_q)]
+        flat = np.concatenate(flat)
+        scores = np.bincount(
+            flat, weights=np.concatenate(weights), minlength=n_q * self.n_docs
+        ).reshape(n_q, self.n_docs)
+        # one posting per (term, doc), so counting postings counts the query terms each doc has
+        matched = np.bincount(flat, minlength=n_q * self.n_docs).reshape(n_q, self.n_docs)
+
+        k = min(k, self.n_docs)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        out = []
+        for qi in range(n_q):
+            row = scores[qi]
+            best = top[qi][np.argsort(-row[top[qi]], kind="stable")]
+            out.append([
+                KBHit(int(d), float(row[d]), float(row[d]) / ideal[qi] if ideal[qi] else 0.0,
+                      float(matched[qi, d] / n_terms[qi]))
+                for d in best if row[d] > 0
+            ])
+        return out
+
+
+def build_ranker(entries):
+    """BM25Ranker for the entries, or None when NumPy is unavailable."""
+    if np is None or not entries:
+        return None
+    return BM25Ranker(entries)
@@ -0,0 +1,303 @@
+"""Compiled, read-only KB snapshot that workers mmap instead of parsing kb.json.
+
+Layout (little-endian): an 8-byte magic, format version and section count,
+a section table of (name, offset, length), then 8-byte aligned sections.
+Strings live once in a UTF-8 ``blob``; every other section is a flat int64 /
+int32 / float32 array pointing into it. Lookups binary-search the sorted
+string tables in place, so opening a snapshot costs a few header reads no
+matter how large the KB is, and every worker shares the same page-cache copy.
+"""
+import json, mmap, os, struct, sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from utils.kb_index import tokenize, MIN_TOKEN_LEN, NATIVE_STOPWORDS
+from utils.kb_rank import BM25Ranker, build_ranker, np
+
+MAGIC = b"AGKBSNAP"
+FORMAT_VERSION = 3  # bump whenever tokenization or the token table changes
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<16sQQ")
+
+
+# === Writing ===
+class _Blob:
+    def __init__(self):
+        self.parts, self.size, self._seen = [], 0, {}
+
+    def add(self, s: str):
+        """(offset, length) of s in the blob; identical strings are stored once."""
+        ref = self._seen.get(s)
+        if ref is None:
+            raw = s.encode("utf-8")
+            ref = (self.size, len(raw))
+            self.parts.append(raw)
+            self.size += len(raw)
+            self._seen[s] = ref
+        return ref
+
+
+def _sorted_table(blob, strings):
+    """Sort strings by UTF-8 bytes (the order lookups bisect on) and return (order, refs)."""
+    order = sorted(strings, key=lambda s: s.encode("utf-8"))
+    refs = array("q")
+    for s in order:
+        refs.extend(blob.add(s))
+    return order, refs
+
+
+def write_snapshot(path, entries, langs, sources=()):
+    """Compile entries into a snapshot file at path (written atomically)."""
+    blob = _Blob()
+    langs = list(langs)
+
+    answers, ekw_ptr, ekw = array("q"), array("q", [0]), array("q")
+    for entry in entries:
+        for lang in langs:
+            answers.extend(blob.add(entry["answers"].get(lang) or ""))
+        for k in entry["keywords"]:
+            ekw.extend(blob.add(k))
+        ekw_ptr.append(len(ekw) // 2)
+
+    # keyword priority mirrors KBIndex: first position wins, last entry owns the keyword
+    position, owner = {}, {}
+    for eid, entry in enumerate(entries):
+        for k in entry["keywords"]:
+            position.setdefault(k.lower(), len(position))
+            owner[k.lower()] = eid
+    pos_entry = array("q", [0] * len(position))
+    phrase_pos, token_pos, kw_tokens, max_phrase = {}, {}, set(), 0
+    for k, pos in position.items():
+        pos_entry[pos] = owner[k]
+        toks = tokenize(k)
+        if not toks:
+            continue
+        max_phrase = max(max_phrase, len(toks))
+        phrase = " ".join(toks)
+        phrase_pos[phrase] = min(pos, phrase_pos.get(phrase, pos))
+        kw_tokens.update(toks)
+        for t in toks:
+            # function words ("कैसे", "எப்படி") never loose-match a keyword, as in KBIndex.match_token
+            if t not in NATIVE_STOPWORDS:
+                token_pos[t] = min(pos, token_pos.get(t, pos))
+
+    phrases, phr_refs = _sorted_table(blob, phrase_pos)
+    phr_pos = array("q", (phrase_pos[p] for p in phrases))
+
+    ranker = build_ranker(entries)
+    vocab = kw_tokens | (set(ranker.vocab) if ranker else set())
+    tokens, tok_refs = _sorted_table(blob, vocab)
+    tok_pos = array("q", (token_pos.get(t, -1) for t in tokens))
+
+    sections = {
+        "blob": b"".join(blob.parts),
+        "answers": answers.tobytes(),
+        "ekw_ptr": ekw_ptr.tobytes(),
+        "ekw": ekw.tobytes(),
+        "pos_entry": pos_entry.tobytes(),
+        "phr": phr_refs.tobytes(),
+        "phr_pos": phr_pos.tobytes(),
+        "tok": tok_refs.tobytes(),
+        "tok_pos": tok_pos.tobytes(),
+    }
+    meta = {
+        "langs": langs,
+        "n_entries": len(entries),
+        "max_phrase": max_phrase,
+        "sources": [list(s) for s in sources],
+        "bm25": ranker is not None,
+    }
+    if ranker is not None:
+        # re-key BM25 postings by position in the sorted token table
+        old_ids = np.asarray([ranker.vocab.get(t, -1) for t in tokens], dtype=np.int64)
+        lengths = np.where(old_ids >= 0, np.diff(ranker.indptr)[old_ids], 0)
+        indptr = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        gather = np.concatenate(
+            [np.arange(ranker.indptr[o], ranker.indptr[o + 1]) for o in old_ids if o >= 0]
+            or [np.zeros(0, dtype=np.int64)]
+        )
+        idf = np.where(old_ids >= 0, ranker.idf[old_ids], 0).astype(np.float32)
+        sections.update({
+            "bm25_indptr": indptr.tobytes(),
+            "bm25_docs": ranker.doc_ids[gather].astype(np.int32).tobytes(),
+            "bm25_weights": ranker.weights[gather].astype(np.float32).tobytes(),
+            "bm25_idf": idf.tobytes(),
+        })
+        meta.update({"k1": ranker.k1, "b": ranker.b, "max_idf": ranker.max_idf})
+    sections["meta"] = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+    table_end = _HEADER.size + _SECTION.size * len(sections)
+    offset, layout = (table_end + 7) & ~7, []
+    for name, data in sections.items():
+        layout.append((name, offset, len(data)))
+        offset = (offset + len(data) + 7) & ~7
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)))
+        for name, off, length in layout:
+            f.write(_SECTION.pack(name.encode(), off, length))
+        for (name, off, _), data in zip(layout, sections.values()):
+            f.write(b"\0" * (off - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+# === Reading ===
+class _StringTable:
+    """Sorted UTF-8 strings addressed by (offset, length) pairs into the blob."""
+
+    def __init__(self, blob, refs):
+        self._blob, self._refs = blob, refs
+        self._n = len(refs) // 2
+
+    def __len__(self):
+        return self._n
+
+    def raw(self, i) -> bytes:
+        off = self._refs[2 * i]
+        return bytes(self._blob[off:off + self._refs[2 * i + 1]])
+
+    def __getitem__(self, i) -> str:
+        return self.raw(i).decode("utf-8")
+
+    def _bisect(self, raw: bytes):
+        return bisect_left(range(self._n), raw, key=self.raw)
+
+    def get(self, s, default=None):
+        """Index of s in the table, or default."""
+        raw = s.encode("utf-8")
+        i = self._bisect(raw)
+        return i if i < self._n and self.raw(i) == raw else default
+
+    def has_prefix(self, prefix: str) -> bool:
+        raw = prefix.encode("utf-8")
+        i = self._bisect(raw)
+        return i < self._n and self.raw(i).startswith(raw)
+
+
+class _MappedEntries(Sequence):
+    """Entry table decoded on access into the same dict shape load_kb_entries returns."""
+
+    def __init__(self, snap):
+        self._s = snap
+
+    def __len__(self):
+        return self._s.meta["n_entries"]
+
+    def answers(self, i):
+        s, langs = self._s, self._s.meta["langs"]
+        base = 2 * i * len(langs)
+        return {
+            lang: s.string(s.answers[base + 2 * j], s.answers[base + 2 * j + 1])
+            for j, lang in enumerate(langs)
+        }
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        s = self._s
+        keywords = [s.string(s.ekw[2 * j], s.ekw[2 * j + 1]) for j in range(s.ekw_ptr[i], s.ekw_ptr[i + 1])]
+        return {"keywords": keywords, "answers": self.answers(i)}
+
+
+class MappedKBIndex:
+    """KBIndex counterpart that answers lookups straight from the mapped tables."""
+
+    def __init__(self, snap):
+        self._s = snap
+        self.phrases = _StringTable(snap.blob, snap.phr)
+        self.tokens = _StringTable(snap.blob, snap.tok)
+
+    def __len__(self):
+        return len(self._s.pos_entry)
+
+    def vocabulary(self):
+        """Every token in the snapshot (keywords and ranked answer text)."""
+        return (self.tokens[i] for i in range(len(self.tokens)))
+
+    def match_phrase(self, tokens):
+        best, max_len = None, self._s.meta["max_phrase"]
+        for i in range(len(tokens)):
+            for j in range(i + 1, min(i + max_len, len(tokens)) + 1):
+                phrase = " ".join(tokens[i:j])
+                k = self.phrases.get(phrase)
+                if k is not None:
+                    pos = self._s.phr_pos[k]
+                    best = pos if best is None else min(best, pos)
+                if not self.phrases.has_prefix(phrase + " "):
+                    break  # no longer phrase starts this way
+        return best
+
+    def match_token(self, tokens):
+        best = None
+        for t in tokens:
+            if len(t) < MIN_TOKEN_LEN or t in NATIVE_STOPWORDS:
+                continue
+            k = self.tokens.get(t)
+            pos = self._s.tok_pos[k] if k is not None else -1
+            if pos >= 0 and (best is None or pos < best):
+                best = pos
+        return best
+
+    def lookup(self, message: str):
+        tokens = tokenize(message)
+        pos = self.match_phrase(tokens)
+        if pos is None:
+            pos = self.match_token(tokens)
+        return None if pos is None else self._s.entries.answers(self._s.pos_entry[pos])
+
+
+class MappedKB:
+    """A snapshot file mapped read-only; exposes entries, index and ranker."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        magic, version, count = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a KB snapshot (format {version})")
+        self._sections = {}
+        for i in range(count):
+            name, off, length = _SECTION.unpack_from(buf, _HEADER.size + i * _SECTION.size)
+            self._sections[name.rstrip(b"\0").decode()] = buf[off:off + length]
+
+        self.meta = json.loads(bytes(self._sections["meta"]))
+        self.blob = self._sections["blob"]
+        for name in ("answers", "ekw_ptr", "ekw", "pos_entry", "phr", "phr_pos", "tok", "tok_pos"):
+            setattr(self, name, self._sections[name].cast("q"))
+        self.entries = _MappedEntries(self)
+        self.index = MappedKBIndex(self)
+        self.ranker = None
+        if self.meta.get("bm25") and np is not None:
+            sec = self._sections
+            self.ranker = BM25Ranker.from_arrays(
+                self.index.tokens,
+                np.frombuffer(sec["bm25_indptr"], dtype=np.int64),
+                np.frombuffer(sec["bm25_docs"], dtype=np.int32),
+                np.frombuffer(sec["bm25_weights"], dtype=np.float32),
+                np.frombuffer(sec["bm25_idf"], dtype=np.float32),
+                self.meta["max_idf"], self.meta["n_entries"], self.meta["k1"], self.meta["b"],
+            )
+
+    @property
+    def sources(self):
+        return [tuple(s) for s in self.meta.get("sources", [])]
+
+    def string(self, off, length) -> str:
+        return bytes(self.blob[off:off + length]).decode("utf-8")
+
+
+def open_snapshot(path):
+    """MappedKB for path, or None when the file is missing or unreadable."""
+    if sys.byteorder != "little" or not os.path.exists(path):
+        return None
+    try:
+        return MappedKB(path)
+    except (OSError, ValueError, KeyError) as e:
+        print("⚠️ Ignoring KB snapshot:", e)
+        return None
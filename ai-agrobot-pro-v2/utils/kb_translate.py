@@ -0,0 +1,53 @@
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+def load_translator(spec: str):
+    """Translator for a ``module:function`` spec, or None for "none" / empty.
+
+    The function is called as ``fn(text, target_lang)`` and returns the
+    translation, so any local model can stand in for Google Translate.
+    """
+    if not spec or spec == "none":
+        return None
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name or "translate")
+
+
+def fill_translations(entries, langs, translate, source="en", workers=8):
+    """Fill every empty answer in langs by translating the entry's source answer.
+
+    Entries are updated in place. Each distinct (text, lang) pair is
+    translated once, concurrently; a failed translation leaves its answer
+    empty so the request path can still translate it later.
+    Returns (filled, failed).
+    """
+    todo = {}
+    for entry in entries:
+        answers = entry["answers"]
+        text = answers.get(source)
+        if not text:
+            continue
+        for lang in langs:
+            if lang != source and not answers.get(lang):
+                todo.setdefault((text, lang), []).append(answers)
+    if not todo:
+        return 0, 0
+
+    def run(args):
+        try:
+            return translate(*args)
+        except Exception as e:
+            print(f"⚠️ KB translation to {args[1]} failed:", e)
+            return None
+
+    filled = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (text, lang), result in zip(todo, pool.map(run, todo)):
+            for answers in todo[(text, lang)]:
+                if result:
+                    answers[lang] = result
+                    filled += 1
+                else:
+                    failed += 1
+    return filled, failed
@@ -0,0 +1,71 @@
+import re, unicodedata
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+
+# (first, last, language) per script block, sorted by first code point
+SCRIPT_RANGES = (
+    (0x0041, 0x005A, "latin"),
+    (0x0061, 0x007A, "latin"),
+    (0x00C0, 0x024F, "latin"),
+    (0x0900, 0x097F, "hi"),  # Devanagari
+    (0x0980, 0x09FF, "bn"),
+    (0x0A00, 0x0A7F, "pa"),  # Gurmukhi
+    (0x0A80, 0x0AFF, "gu"),
+    (0x0B80, 0x0BFF, "ta"),
+    (0x0C00, 0x0C7F, "te"),
+    (0x0C80, 0x0CFF, "kn"),
+    (0x0D00, 0x0D7F, "ml"),
+    (0xA8E0, 0xA8FF, "hi"),  # Devanagari Extended
+)
+_STARTS = [r[0] for r in SCRIPT_RANGES]
+
+# Function words that mark ASCII text as English without running the n-gram model
+ENGLISH_HINTS = frozenset(
+    "the is are what how when which why where can should do does my to for in on of and with "
+    "i it this that hi hello hey thanks please".split()
+)
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def script_of(ch: str):
+    """Language of the script block ch belongs to, or None (digits, punctuation, emoji...)."""
+    cp = ord(ch)
+    i = bisect_right(_STARTS, cp) - 1
+    if i >= 0 and cp <= SCRIPT_RANGES[i][1]:
+        return SCRIPT_RANGES[i][2]
+    return None
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+class LanguageDetector:
+    """Classify text by Unicode script first, and only run ``fallback`` on unclear Latin text.
+
+    Any Indic script outweighs Latin, so a Hindi question with English crop
+    names is still Hindi. Results are cached per normalized message.
+    """
+
+    def __init__(self, fallback, default="en", cache_size=4096):
+        self._fallback = fallback
+        self.default = default
+        self.detect = lru_cache(maxsize=cache_size)(self._detect)
+
+    def __call__(self, text: str) -> str:
+        return self.detect(_normalize(text or ""))
+
+    def _detect(self, text: str) -> str:
+        scripts = Counter(filter(None, map(script_of, text)))
+        latin = scripts.pop("latin", 0)
+        if scripts:
+            return scripts.most_common(1)[0][0]
+        if not latin:
+            return self.default
+        if text.isascii() and not ENGLISH_HINTS.isdisjoint(_WORD_RE.findall(text)):
+            return "en"
+        try:
+            return self._fallback(text)
+        except Exception:
+            return self.default
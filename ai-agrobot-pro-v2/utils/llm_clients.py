@@ -0,0 +1,94 @@
+import os, threading, time
+
+
+class ClientRegistry:
+    """LLM model / client objects created once per worker process and shared by every request.
+
+    Each provider registers a ``factory`` (and optionally a cheap ``warmup``
+    call and a ``pool_stats`` reader). ``get(name)`` builds the client on
+    first use and returns the same instance afterwards, so its HTTP/gRPC
+    connections stay open between requests. Connections don't survive a
+    fork, so a forked worker starts with an empty registry.
+    """
+
+    def __init__(self):
+        self._providers = {}
+        self._clients = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def register(self, name, factory, warmup=None, pool_stats=None):
+        self._providers[name] = (factory, warmup, pool_stats)
+        self._stats.setdefault(name, {"created": 0, "reused": 0, "warmup_ms": None, "error": None})
+
+    def get(self, name):
+        """The shared client for name; raises whatever the factory raises."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._clients, self._pid = {}, os.getpid()
+        client = self._clients.get(name)
+        if client is not None:
+            self._stats[name]["reused"] += 1
+            return client
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                try:
+                    client = self._providers[name][0]()
+                except Exception as e:
+                    self._stats[name]["error"] = str(e)
+                    raise
+                self._clients[name] = client
+                self._stats[name]["created"] += 1
+                self._stats[name]["error"] = None
+        return client
+
+    def warmup(self, names=None):
+        """Create the clients and run each provider's warmup call; returns {name: ms or error}."""
+        out = {}
+        for name in names or list(self._providers):
+            warm = self._providers[name][1]
+            start = time.perf_counter()
+            try:
+                client = self.get(name)
+                if warm is not None:
+                    warm(client)
+                ms = round((time.perf_counter() - start) * 1000, 1)
+                self._stats[name]["warmup_ms"] = out[name] = ms
+            except Exception as e:
+                print(f"⚠️ {name} warmup failed:", e)
+                self._stats[name]["error"] = out[name] = str(e)
+        return out
+
+    def stats(self):
+        out = {}
+        for name, (_, _, pool_stats) in self._providers.items():
+            entry = dict(self._stats[name], live=name in self._clients)
+            if pool_stats is not None and name in self._clients:
+                try:
+                    entry["pool"] = pool_stats(self._clients[name])
+                except Exception as e:
+                    entry["pool"] = {"error": str(e)}
+            out[name] = entry
+        return out
+
+
+# seconds before a single upstream LLM request is abandoned
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+
+def genai_request_options():
+    """request_options for generate_content(): without a timeout a stalled call holds its gateway slot forever."""
+    return {"timeout": LLM_TIMEOUT}
+
+
+def genai_options():
+    """Extra genai.configure() kwargs: GEMINI_BASE_URL points the REST transport at another host (e.g. a mock)."""
+    base_url = os.getenv("GEMINI_BASE_URL")
+    return {"transport": "rest", "client_options": {"api_endpoint": base_url}} if base_url else {}
+
+
+# Shared by chatbot_model and gemini_helper
+CLIENTS = ClientRegistry()
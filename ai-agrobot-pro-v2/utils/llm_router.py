@@ -0,0 +1,178 @@
+import os, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.llm_gateway import GatewayBusy
+
+
+class NoProviderAvailable(Exception):
+    """Every provider failed, returned nothing, or has its circuit open."""
+
+
+class Provider:
+    """One LLM backend: ``fn(prompt) -> text`` plus its rolling stats and circuit breaker.
+
+    The circuit opens after ``failure_threshold`` consecutive failures, or
+    when at least half of the last ``window`` calls failed. After
+    ``cooldown`` seconds one trial call is let through (half-open); success
+    closes the circuit, failure re-opens it. GatewayBusy is local back-pressure,
+    not an upstream error: it is counted separately and never trips the breaker.
+    """
+
+    def __init__(self, name, fn, window=100, failure_threshold=3, cooldown=30.0):
+        self.name = name
+        self.fn = fn
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._samples = deque(maxlen=window)  # (seconds, ok)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self.busy = 0
+
+    # === Stats ===
+    def percentile(self, q):
+        """Latency (seconds) of successful calls at quantile q, or None without samples."""
+        with self._lock:
+            lat = sorted(s for s, ok in self._samples if ok)
+        if not lat:
+            return None
+        return lat[min(len(lat) - 1, int(q * len(lat)))]
+
+    @property
+    def error_rate(self):
+        with self._lock:
+            n = len(self._samples)
+            return sum(not ok for _, ok in self._samples) / n if n else 0.0
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    # === Circuit ===
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now (claims the half-open trial)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def release(self):
+        """Give back a claimed half-open trial without a sample, for a call that never reached the provider."""
+        with self._lock:
+            self._trial = False
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self._samples.append((seconds, ok))
+            self._trial = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            n = len(self._samples)
+            failed = sum(not s_ok for _, s_ok in self._samples)
+            if self._opened_at is not None or self._failures >= self.failure_threshold or (n >= 10 and failed * 2 >= n):
+                if self._opened_at is None:
+                    print(f"⚠️ LLM provider {self.name}: circuit open")
+                self._opened_at = time.monotonic()
+
+    def call(self, prompt):
+        """Run the provider once; returns the text, or None on error / empty answer."""
+        start = time.perf_counter()
+        try:
+            text = self.fn(prompt)
+        except GatewayBusy:
+            with self._lock:
+                self.busy += 1
+            self.release()
+            raise
+        except Exception as e:
+            print(f"⚠️ LLM provider {self.name} error:", e)
+            text = None
+        self.record(time.perf_counter() - start, bool(text))
+        return text or None
+
+    def stats(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "state": self.state,
+            "calls": len(self._samples),
+            "p50_ms": p50 and round(p50 * 1000, 1),
+            "p95_ms": p95 and round(p95 * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "busy": self.busy,
+        }
+
+
+class LLMRouter:
+    """Sends each prompt to the fastest healthy provider, failing over to the next.
+
+    Providers are ranked by rolling p50 latency; one without samples yet
+    ranks by registration order ahead of measured ones, so it gets tried.
+    With ``hedge_after`` (seconds), a call still running after that long is
+    raced against the next provider and the first non-empty answer wins.
+    """
+
+    def __init__(self, hedge_after=None, max_workers=8):
+        self.providers = []
+        self.hedge_after = hedge_after or None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+        self.hedges = 0
+        self.wins = {}
+
+    def add(self, name, fn, **breaker):
+        self.providers = [p for p in self.providers if p.name != name] + [Provider(name, fn, **breaker)]
+
+    def ranked(self):
+        order = {p.name: i for i, p in enumerate(self.providers)}
+        healthy = [p for p in self.providers if p.state != "open"]
+        return sorted(healthy, key=lambda p: (p.percentile(0.5) is not None, p.percentile(0.5) or 0, order[p.name]))
+
+    def complete(self, prompt) -> str:
+        queue = self.ranked()
+        pending = {}
+
+        def launch():
+            while queue:
+                p = queue.pop(0)
+                if p.allow():
+                    pending[self._pool.submit(p.call, prompt)] = p
+                    return True
+            return False
+
+        launch()
+        while pending:
+            hedge = self.hedge_after if queue else None
+            done, _ = wait(pending, timeout=hedge, return_when=FIRST_COMPLETED)
+            if not done:
+                if launch():
+                    self.hedges += 1
+                continue
+            for f in done:
+                p = pending.pop(f)
+                text = f.result()
+                if text:
+                    self.wins[p.name] = self.wins.get(p.name, 0) + 1
+                    return text
+            if not pending:
+                launch()
+        raise NoProviderAvailable("no LLM provider answered")
+
+    def stats(self):
+        return {
+            "providers": {p.name: dict(p.stats(), wins=self.wins.get(p.name, 0)) for p in self.providers},
+            "hedges": self.hedges,
+            "hedge_after_s": self.hedge_after,
+        }
+
+
+# Shared by every module that calls an LLM; providers are registered where their clients live
+ROUTER = LLMRouter(hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "0")))
@@ -0,0 +1,136 @@
+import re, threading, time
+from collections import Counter, OrderedDict
+
+from utils.kb_index import tokenize
+from utils.kb_rank import STOPWORDS
+
+# "how" and "when" (or "do" and "do not") ask different questions, so these always stay in the signature
+QUESTION_WORDS = frozenset(tokenize(
+    "how what when where which who whom whose why "
+    "कैसे क्या क्यों कब कहाँ कहां कौन कौनसा कितना कितनी कितने "
+    "என்ன எப்படி எப்போது ஏன் எங்கே எது எந்த யார் எவ்வளவு எத்தனை"
+))
+# tokenized like questions are, so e.g. the Tamil pulli is dropped the same way
+NEGATIONS = frozenset(tokenize(
+    "no not never nor without cannot "
+    "नहीं न मत बिना "
+    "இல்லை வேண்டாம் இல்லாமல்"
+))
+_CONTRACTED_NOT = re.compile(r"n['’]t\b", re.IGNORECASE)
+SIGNATURE_STOPWORDS = STOPWORDS - QUESTION_WORDS - NEGATIONS
+
+
+def question_signature(text: str) -> str:
+    """Order-free bag of content and question words: "why are my tomato leaves yellow" -> "leaves tomato why yellow"."""
+    text = _CONTRACTED_NOT.sub(" not", text)  # "don't" -> "do not"
+    return " ".join(sorted({t for t in tokenize(text) if t not in SIGNATURE_STOPWORDS}))
+
+
+def intent_words(sig: str) -> frozenset:
+    """The question words and negations of a signature; near-duplicates must agree on them."""
+    return frozenset(t for t in sig.split() if t in QUESTION_WORDS or t in NEGATIONS)
+
+
+def trigrams(sig: str) -> frozenset:
+    padded = f" {sig} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class ResponseCache:
+    """LLM fallback answers keyed by (context, question signature), with TTL and LRU eviction.
+
+    ``context`` is any hashable tuple of what else shapes the answer (target
+    language, crop, region). Near-duplicate matching is opt-in: with a
+    ``similarity`` threshold, an exact-signature miss reuses the cached
+    question in the same context with the highest character-trigram Jaccard
+    similarity, if it reaches the threshold and has the same question words
+    and negations.
+    """
+
+    def __init__(self, max_entries=2000, ttl=86400.0, similarity=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()  # (context, sig) -> (answer, expires, grams, intent)
+        self._grams = {}  # (context, trigram) -> {sig}
+        self._lock = threading.Lock()
+        self.hits = self.near_hits = self.misses = self.evictions = 0
+
+    def get(self, question: str, context=()):
+        """Cached answer for the question (or a near-duplicate of it), or None."""
+        sig = question_signature(question)
+        if not sig:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            key = (context, sig)
+            found = self._entries.get(key)
+            if found is not None and found[1] < now:
+                self._drop(key)
+                found = None
+            if found is None and self.similarity:
+                key = self._nearest(context, sig, now)
+                found = self._entries.get(key) if key else None
+                if found is not None:
+                    self.near_hits += 1
+            elif found is not None:
+                self.hits += 1
+            if found is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return found[0]
+
+    def put(self, question: str, answer: str, context=()):
+        sig = question_signature(question)
+        if not sig or not answer:
+            return
+        key = (context, sig)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            grams = trigrams(sig)
+            self._entries[key] = (answer, time.monotonic() + self.ttl, grams, intent_words(sig))
+            for g in grams:
+                self._grams.setdefault((context, g), set()).add(sig)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    # === Internals ===
+    def _nearest(self, context, sig, now):
+        grams, intent = trigrams(sig), intent_words(sig)
+        shared = Counter()
+        for g in grams:
+            shared.update(self._grams.get((context, g), ()))
+        best, best_score = None, self.similarity
+        for cand, n in shared.most_common():
+            key = (context, cand)
+            entry = self._entries[key]
+            if n / len(grams) < best_score:
+                break  # Jaccard can't beat n / |grams|, and n only shrinks from here
+            score = n / (len(grams) + len(entry[2]) - n)
+            if score >= best_score and entry[1] >= now and entry[3] == intent:
+                best, best_score = key, score
+        return best
+
+    def _drop(self, key):
+        context, sig = key
+        grams = self._entries.pop(key)[2]
+        for g in grams:
+            sigs = self._grams.get((context, g))
+            if sigs is not None:
+                sigs.discard(sig)
+                if not sigs:
+                    del self._grams[(context, g)]
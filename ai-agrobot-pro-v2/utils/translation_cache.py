@@ -0,0 +1,131 @@
+import hashlib, os, re, sqlite3, threading, time, unicodedata
+from collections import OrderedDict
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_key_text(text: str) -> str:
+    """NFC with whitespace collapsed, so trivially different copies share a cache entry."""
+    return _SPACES.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationCache:
+    """Two-tier translation cache keyed by (normalized text, source, target).
+
+    Tier 1 is an in-process LRU bounded by the total characters it holds.
+    Tier 2 is an SQLite table shared by every worker that survives restarts;
+    disk hits are promoted into the LRU. It keeps the ``max_rows`` most
+    recently written translations: older rows are pruned when the first
+    connection opens and then every ``prune_every`` writes.
+    """
+
+    def __init__(self, db_path, max_chars=2_000_000, max_rows=100_000, prune_every=500):
+        self.db_path = db_path
+        self.max_chars = max_chars
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lru = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits_memory = self.hits_disk = self.misses = self.disk_errors = self.disk_pruned = 0
+
+    # === SQLite tier ===
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, source TEXT, target TEXT, translation TEXT, created_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)")
+            self._local.conn = conn
+            self._prune(conn)
+        return conn
+
+    def _prune(self, conn):
+        """Delete all but the max_rows newest rows."""
+        cur = conn.execute(
+            "DELETE FROM translations WHERE key IN "
+            "(SELECT key FROM translations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+        conn.commit()
+        if cur.rowcount > 0:
+            with self._lock:
+                self.disk_pruned += cur.rowcount
+
+    @staticmethod
+    def _key(text, source, target):
+        raw = f"{source}\0{target}\0{normalize_key_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # === Public API ===
+    def get(self, text, source, target):
+        """Cached translation or None."""
+        key = self._key(text, source, target)
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self.hits_memory += 1
+                return value
+        try:
+            row = self._conn().execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print("⚠️ Translation cache read error:", e)
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits_disk += 1
+        self._remember(key, row[0])
+        return row[0]
+
+    def put(self, text, source, target, translation):
+        key = self._key(text, source, target)
+        self._remember(key, translation)
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                (key, source, target, translation, time.time()),
+            )
+            conn.commit()
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % self.prune_every == 0
+            if prune:
+                self._prune(conn)
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print("⚠️ Translation cache write error:", e)
+
+    def _remember(self, key, value):
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._chars -= len(old)
+            self._lru[key] = value
+            self._chars += len(value)
+            while self._chars > self.max_chars and len(self._lru) > 1:
+                _, evicted = self._lru.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def stats(self):
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._lru),
+            "memory_chars": self._chars,
+            "disk_errors": self.disk_errors,
+            "disk_pruned": self.disk_pruned,
+        }